@@ -1,20 +1,30 @@
-import pandas as pd
-from modules.fetch_csv import read_csv_data
+import threading
 from modules.user_input import get_user_details
-from modules.process_data import manipulate_data
 from modules.send_output import send_result, setup_automation
 
+def _preload_data_modules():
+    """Import pandas and the data pipeline in the background while the user types"""
+    import modules.fetch_csv  # noqa: F401
+    import modules.process_data  # noqa: F401
+
 def main():
-    # Step 1: Read data
-    expense_data: pd.DataFrame = read_csv_data("data/Expenses.csv")
-    print(f"Expense Data:\n{expense_data.columns.to_list()}")
-    income_data: pd.DataFrame = read_csv_data("data/Income.csv")
-    print(f"Income Data:\n{income_data.columns.to_list()}")
+    preload = threading.Thread(target=_preload_data_modules, daemon=True)
+    preload.start()
 
-    # Step 2: Get user input
+    # Step 1: Get user input (pandas finishes importing meanwhile)
     user_info = get_user_details()
     print(f"User Info: {user_info}")
 
+    # Step 2: Read data
+    preload.join()
+    from modules.fetch_csv import read_csv_data
+    from modules.process_data import manipulate_data
+
+    expense_data = read_csv_data("data/Expenses.csv")
+    print(f"Expense Data:\n{expense_data.columns.to_list()}")
+    income_data = read_csv_data("data/Income.csv")
+    print(f"Income Data:\n{income_data.columns.to_list()}")
+
     # Step 3: Manipulate data
     result = manipulate_data(expense_data, income_data, user_info)
 
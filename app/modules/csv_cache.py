@@ -0,0 +1,127 @@
+"""
+Columnar on-disk cache for the CSV inputs.
+
+The first load of a CSV converts it into one NumPy ``.npy`` file per column
+(text columns are stored as integer codes plus a category list). Later
+loads memory-map those arrays instead of re-parsing text. The cache is
+keyed on the source file's size and mtime; if either changes, the content
+hash decides whether the cached copy is still good or must be rebuilt.
+
+Set CSV_CACHE_DIR to move the cache (default: a .cache folder next to the CSV).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1
+META_FILE = 'meta.json'
+
+
+def _cache_dir(filepath):
+    root = os.environ.get('CSV_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(filepath)), '.cache')
+    return os.path.join(root, os.path.basename(filepath))
+
+
+def file_hash(filepath, block_size=1 << 20):
+    """Return the sha256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_stat(filepath):
+    st = os.stat(filepath)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == CACHE_VERSION else None
+
+
+def _write_cache(df, cache_dir, source):
+    """Write df column by column into a fresh cache directory"""
+    parent = os.path.dirname(cache_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        entry = {'name': name, 'file': f'{i}.npy'}
+        # Plain NumPy columns (numbers, bools, naive datetimes) map straight to disk
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufM':
+            entry['kind'] = 'array'
+            np.save(os.path.join(tmp_dir, entry['file']), series.to_numpy())
+        else:
+            categorical = series.astype('category')
+            entry['kind'] = 'category'
+            entry['categories'] = [str(c) for c in categorical.cat.categories]
+            np.save(os.path.join(tmp_dir, entry['file']), categorical.cat.codes.to_numpy())
+        columns.append(entry)
+
+    meta = dict(source, version=CACHE_VERSION, rows=len(df), columns=columns)
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    return meta
+
+
+def _load_cache(cache_dir, meta):
+    data = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(cache_dir, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'category':
+            data[entry['name']] = pd.Categorical.from_codes(values, entry['categories'])
+        else:
+            data[entry['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def load_cached(filepath, loader, verify_hash=False):
+    """Return the DataFrame for ``filepath``, using the columnar cache when valid.
+
+    ``loader(filepath)`` parses the CSV on a cache miss. With ``verify_hash``
+    the content hash is checked even when size and mtime are unchanged.
+    """
+    cache_dir = _cache_dir(filepath)
+    source = _source_stat(filepath)
+    meta = _read_meta(cache_dir)
+
+    if meta is not None:
+        unchanged = meta['size'] == source['size'] and meta['mtime_ns'] == source['mtime_ns']
+        if unchanged and not verify_hash:
+            return _load_cache(cache_dir, meta)
+
+        # Size/mtime moved (e.g. a touch or a copy): the hash has the final say
+        source['sha256'] = file_hash(filepath)
+        if source['sha256'] == meta.get('sha256'):
+            if not unchanged:
+                meta.update(source)
+                with open(os.path.join(cache_dir, META_FILE), 'w') as f:
+                    json.dump(meta, f)
+            return _load_cache(cache_dir, meta)
+
+    source.setdefault('sha256', file_hash(filepath))
+    df = loader(filepath)
+    meta = _write_cache(df, cache_dir, source)
+    return _load_cache(cache_dir, meta)
+
+
+def clear_cache(filepath):
+    """Remove the cached copy of a CSV file"""
+    shutil.rmtree(_cache_dir(filepath), ignore_errors=True)
@@ -1,11 +1,88 @@
 import pandas as pd
 
-def read_csv_data(filepath):
+from .csv_cache import load_cached
+
+DATE_FORMAT = '%m/%d/%Y'
+DEFAULT_CHUNKSIZE = 100_000
+
+# Explicit dtypes for the documented CSV layouts (Date is parsed separately)
+EXPENSE_DTYPES = {
+    'Date': 'string',
+    'Category': 'category',
+    'Amount': 'float64',
+    'Description': 'string',
+    'Payment_Method': 'category',
+    'Vendor': 'category',
+}
+
+INCOME_DTYPES = {
+    'Date': 'string',
+    'Amount': 'float64',
+    'Source': 'category',
+    'Type': 'category',
+    'Notes': 'string',
+}
+
+SCHEMAS = {
+    'expenses': EXPENSE_DTYPES,
+    'income': INCOME_DTYPES,
+}
+
+
+def detect_schema(filepath):
+    """Return 'expenses', 'income' or None based on the CSV header"""
+    header = pd.read_csv(filepath, nrows=0).columns
+    for kind, dtypes in SCHEMAS.items():
+        if set(dtypes) <= set(header):
+            return kind
+    return None
+
+
+def _read_kwargs(filepath, kind):
+    """Return read_csv arguments for a known schema (none for unknown files)"""
+    kind = kind or detect_schema(filepath)
+    if kind is None:
+        return {}
+    dtypes = SCHEMAS[kind]
+    return {'dtype': dtypes, 'usecols': list(dtypes)}
+
+
+def _parse_dates(df):
+    # Fixed m/d/Y format takes pandas' fast path instead of per-row inference
+    df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT, errors='coerce')
+    return df
+
+
+def iter_csv_chunks(filepath, kind=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield typed DataFrame chunks so large files can be processed in constant memory.
+
+    ``kind`` is 'expenses' or 'income'; it is detected from the header if omitted.
+    """
+    kwargs = _read_kwargs(filepath, kind)
+    with pd.read_csv(filepath, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield _parse_dates(chunk) if kwargs else chunk
+
+
+def _read_typed(filepath, kind=None):
+    kwargs = _read_kwargs(filepath, kind)
+    df = pd.read_csv(filepath, **kwargs)
+    return _parse_dates(df) if kwargs else df
+
+
+def read_csv_data(filepath, kind=None, use_cache=True):
+    """
+    Load a CSV file. With ``use_cache`` the parsed columns are kept in a
+    columnar cache and reused until the file changes; text columns then
+    come back as categoricals.
+    """
     try:
-        df = pd.read_csv(filepath)
+        if use_cache:
+            df = load_cached(filepath, lambda path: _read_typed(path, kind))
+        else:
+            df = _read_typed(filepath, kind)
         print("[INFO] CSV data loaded successfully.")
         return df
     except Exception as e:
         print(f"[ERROR] Failed to read CSV: {e}")
         return pd.DataFrame()  # return empty DataFrame if error
-
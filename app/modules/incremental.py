@@ -0,0 +1,203 @@
+"""
+Incremental aggregation for CSV files that only grow by appended rows.
+
+The scheduled runs keep the byte offset reached by the last run and the
+running weekly/monthly totals for each file in config/csv_state.json. A run
+parses only the bytes appended since then and folds them into the stored
+totals. If the file shrank, or the bytes before the stored offset no longer
+match their fingerprint (the file was edited or replaced), the totals are
+rebuilt from the start of the file. A last row without a newline is
+counted; if a later append continues that same row, the file is rebuilt.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from .fetch_csv import DEFAULT_CHUNKSIZE
+from .process_data import aggregate_by_period, build_summary
+
+STATE_FILE = 'config/csv_state.json'
+STATE_VERSION = 1
+FINGERPRINT_BYTES = 4096
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read a file from its current position up to a fixed end offset"""
+
+    def __init__(self, f, end):
+        self._f = f
+        self._remaining = end - f.tell()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        view = memoryview(buffer)[:self._remaining]
+        n = self._f.readinto(view)
+        self._remaining -= n
+        return n
+
+
+def _fingerprint(f, offset):
+    """Hash the first and last FINGERPRINT_BYTES before ``offset``"""
+    digest = hashlib.sha256()
+    f.seek(0)
+    digest.update(f.read(min(offset, FINGERPRINT_BYTES)))
+    f.seek(max(0, offset - FINGERPRINT_BYTES))
+    digest.update(f.read(offset - f.tell()))
+    return digest.hexdigest()
+
+
+def _extends_last_row(f, offset):
+    """True if bytes were appended directly onto a last row that had no newline"""
+    f.seek(offset)
+    return f.read(1) not in (b'', b'\n', b'\r')
+
+
+def _read_header(f):
+    f.seek(0)
+    line = f.readline()
+    if not line.strip():
+        return None, 0
+    columns = [name.strip() for name in next(csv.reader([line.decode('utf-8-sig')]))]
+    return columns, len(line)
+
+
+def _series_to_json(series):
+    return {f'{year}-{period}': float(total) for (year, period), total in series.items()}
+
+
+def _series_from_json(totals, names):
+    if not totals:
+        return pd.Series([], index=pd.MultiIndex.from_arrays([[], []], names=names), dtype='float64')
+    keys = [tuple(int(part) for part in key.split('-')) for key in totals]
+    return pd.Series(list(totals.values()), index=pd.MultiIndex.from_tuples(keys, names=names),
+                     dtype='float64').sort_index()
+
+
+def _merge(running, new):
+    if running.empty:
+        return new
+    return running.add(new, fill_value=0).sort_index()
+
+
+def _load_state(state_path):
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state.get('files', {}) if state.get('version') == STATE_VERSION else {}
+
+
+def _save_state(state_path, files):
+    parent = os.path.dirname(os.path.abspath(state_path))
+    os.makedirs(parent, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=parent, prefix='.csv_state-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'version': STATE_VERSION, 'files': files}, f)
+    os.replace(tmp_path, state_path)
+
+
+def _aggregate_range(f, columns, start, end):
+    """Aggregate the complete rows between two byte offsets"""
+    weekly = _series_from_json({}, ['year', 'week'])
+    monthly = _series_from_json({}, ['year', 'month'])
+    rows = 0
+    if end <= start:
+        return weekly, monthly, rows
+
+    f.seek(start)
+    stream = io.BufferedReader(_BoundedReader(f, end))
+    # No usecols: a short last row would otherwise fail the column check
+    with pd.read_csv(stream, header=None, names=columns,
+                     dtype={'Date': 'string', 'Amount': 'float64'}, chunksize=DEFAULT_CHUNKSIZE) as reader:
+        for chunk in reader:
+            chunk_weekly, chunk_monthly = aggregate_by_period(chunk['Date'], chunk['Amount'])
+            weekly = _merge(weekly, chunk_weekly)
+            monthly = _merge(monthly, chunk_monthly)
+            rows += len(chunk)
+    return weekly, monthly, rows
+
+
+def update_aggregates(filepath, state_path=STATE_FILE):
+    """Bring the stored totals for ``filepath`` up to date and return (weekly, monthly).
+
+    Only rows appended since the previous call are parsed, unless the file
+    was truncated or rewritten, in which case it is aggregated from scratch.
+    """
+    files = _load_state(state_path)
+    key = os.path.abspath(filepath)
+    entry = files.get(key)
+
+    with open(filepath, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+
+        if entry is not None and entry['offset'] > end:
+            print(f"[INFO] {filepath} was truncated, rebuilding totals.")
+            entry = None
+        elif entry is not None and _fingerprint(f, entry['offset']) != entry['fingerprint']:
+            print(f"[INFO] {filepath} was rewritten, rebuilding totals.")
+            entry = None
+        elif entry is not None and entry['open_row'] and _extends_last_row(f, entry['offset']):
+            # The last row was counted before it was finished
+            print(f"[INFO] {filepath} last row changed, rebuilding totals.")
+            entry = None
+
+        if entry is None:
+            columns, start = _read_header(f)
+            if columns is None:
+                raise ValueError(f"{filepath} has no header row")
+            missing = {'Date', 'Amount'} - set(columns)
+            if missing:
+                raise ValueError(f"{filepath} is missing required columns: {', '.join(sorted(missing))}")
+            weekly = _series_from_json({}, ['year', 'week'])
+            monthly = _series_from_json({}, ['year', 'month'])
+            entry = {'columns': columns, 'rows': 0}
+        else:
+            columns, start = entry['columns'], entry['offset']
+            weekly = _series_from_json(entry['weekly'], ['year', 'week'])
+            monthly = _series_from_json(entry['monthly'], ['year', 'month'])
+
+        new_weekly, new_monthly, new_rows = _aggregate_range(f, columns, start, end)
+        weekly, monthly = _merge(weekly, new_weekly), _merge(monthly, new_monthly)
+        offset = max(start, end)
+        f.seek(offset - 1)
+        entry.update(
+            offset=offset,
+            open_row=f.read(1) != b'\n',
+            fingerprint=_fingerprint(f, offset),
+            rows=entry['rows'] + new_rows,
+            weekly=_series_to_json(weekly),
+            monthly=_series_to_json(monthly),
+        )
+
+    files[key] = entry
+    _save_state(state_path, files)
+    print(f"[INFO] {filepath}: {new_rows:,} new rows ({entry['rows']:,} total).")
+    return weekly, monthly
+
+
+def summarize_files(expense_path, income_path, weekly_budget=0.0, state_path=STATE_FILE):
+    """Return a FinancialSummary for the two CSV files, parsing only appended rows"""
+    weekly_expenses, monthly_expenses = update_aggregates(expense_path, state_path)
+    _, monthly_income = update_aggregates(income_path, state_path)
+    return build_summary(weekly_expenses, monthly_expenses, monthly_income, weekly_budget)
+
+
+def reset_state(filepath=None, state_path=STATE_FILE):
+    """Forget the stored totals for one file (or all files) so the next run rebuilds"""
+    files = _load_state(state_path)
+    if filepath is None:
+        files = {}
+    else:
+        files.pop(os.path.abspath(filepath), None)
+    _save_state(state_path, files)
@@ -1,4 +1,161 @@
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
+
+DATE_FORMAT = '%m/%d/%Y'
+TAX_RATE = 0.25  # Example tax rate, can be adjusted based on tax class and religious status
+
+
+@dataclass
+class FinancialSummary:
+    """Aggregates for one run of the pipeline.
+
+    Weekly series are indexed by (ISO year, ISO week) and monthly series by
+    (year, month), so multi-year files never merge the same week or month
+    from different years.
+    """
+    weekly_expenses: pd.Series
+    monthly_expenses: pd.Series
+    monthly_income: pd.Series
+    total_expenses: float
+    total_income: float
+    monthly_savings: float
+    tax_due: float
+    weekly_budget: float
+
+    @property
+    def over_budget(self):
+        return self.total_expenses > self.weekly_budget
+
+    def as_dict(self):
+        """The legacy manipulate_data result layout"""
+        return {
+            "weekly_expenses": self.weekly_expenses,
+            "monthly_income": self.monthly_income,
+            "monthly_savings": self.monthly_savings,
+            "tax_due": self.tax_due,
+            "total_expenses": self.total_expenses
+        }
+
+
+def _to_days(dates):
+    """Return dates as datetime64[D], converting text only once"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return np.asarray(dates, dtype='datetime64[D]')
+
+    # Transaction files repeat the same dates many times: parse each distinct one once
+    codes, uniques = pd.factorize(pd.Series(dates), use_na_sentinel=True)
+    uniques = pd.Series(uniques)
+    parsed = pd.to_datetime(uniques, format=DATE_FORMAT, errors='coerce')
+    # Rare values in another layout fall back to per-element inference
+    retry = parsed.isna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(uniques[retry], format='mixed', errors='coerce')
+    # Missing values have code -1, which picks the trailing NaT
+    days = np.append(np.asarray(parsed, dtype='datetime64[D]'), np.datetime64('NaT', 'D'))
+    return days[codes]
+
+
+def aggregate_by_period(dates, amounts):
+    """Sum amounts per (ISO year, week) and (year, month) in one vectorized pass.
+
+    Rows with an unparseable date are dropped; missing amounts count as 0.
+    Returns (weekly, monthly) Series.
+    """
+    days = _to_days(dates)
+    amounts = np.nan_to_num(np.asarray(amounts, dtype='float64'))
+    valid = ~np.isnat(days)
+    days, amounts = days[valid], amounts[valid]
+    if len(days) == 0:
+        empty_weeks = pd.MultiIndex.from_arrays([[], []], names=['year', 'week'])
+        empty_months = pd.MultiIndex.from_arrays([[], []], names=['year', 'month'])
+        return pd.Series([], index=empty_weeks, dtype='float64'), pd.Series([], index=empty_months, dtype='float64')
+
+    day_numbers = days.astype('int64')
+    # 1970-01-01 was a Thursday: shift so Monday is weekday 0
+    week_numbers = (day_numbers + 3) // 7
+    month_numbers = days.astype('datetime64[M]').astype('int64')
+
+    # Dense bincounts over the occupied range of weeks and months
+    week_base, month_base = week_numbers.min(), month_numbers.min()
+    week_totals = np.bincount(week_numbers - week_base, weights=amounts)
+    week_counts = np.bincount(week_numbers - week_base)
+    month_totals = np.bincount(month_numbers - month_base, weights=amounts)
+    month_counts = np.bincount(month_numbers - month_base)
+
+    weeks = np.flatnonzero(week_counts) + week_base
+    # ISO year/week are those of the Thursday in each Monday-based week
+    thursdays = (weeks * 7).astype('datetime64[D]')
+    iso_years = thursdays.astype('datetime64[Y]')
+    iso_weeks = (thursdays - iso_years.astype('datetime64[D]')).astype('int64') // 7 + 1
+    weekly = pd.Series(
+        week_totals[weeks - week_base],
+        index=pd.MultiIndex.from_arrays(
+            [iso_years.astype('int64') + 1970, iso_weeks], names=['year', 'week']
+        ),
+    )
+
+    months = np.flatnonzero(month_counts) + month_base
+    monthly = pd.Series(
+        month_totals[months - month_base],
+        index=pd.MultiIndex.from_arrays([months // 12 + 1970, months % 12 + 1], names=['year', 'month']),
+    )
+    return weekly, monthly
+
+
+def build_summary(weekly_expenses, monthly_expenses, monthly_income, weekly_budget=0.0):
+    """Derive the totals from already-aggregated period series"""
+    total_income = float(monthly_income.sum())
+    return FinancialSummary(
+        weekly_expenses=weekly_expenses,
+        monthly_expenses=monthly_expenses,
+        monthly_income=monthly_income,
+        total_expenses=float(weekly_expenses.sum()),
+        total_income=total_income,
+        monthly_savings=total_income - float(monthly_expenses.sum()),
+        tax_due=total_income * 12 * TAX_RATE,  # Annual income
+        weekly_budget=weekly_budget,
+    )
+
+
+def summarize(df_expenses, df_income, weekly_budget=0.0):
+    """Compute every aggregate without modifying the input DataFrames"""
+    weekly_expenses, monthly_expenses = aggregate_by_period(df_expenses['Date'], df_expenses['Amount'])
+    _, monthly_income = aggregate_by_period(df_income['Date'], df_income['Amount'])
+    return build_summary(weekly_expenses, monthly_expenses, monthly_income, weekly_budget)
+
+
+def parse_weekly_budget(user_input):
+    weekly_budget = user_input.get('weekly_budget', 0)
+    try:
+        return float(weekly_budget)
+    except (ValueError, TypeError):
+        print("Warning: Invalid weekly budget, using 0.")
+        return 0.0
+
+
+def report_summary(summary, user_input):
+    """Print the summary and return the legacy result dict (or a message)"""
+    print(f"Weekly Expenses:\n{summary.weekly_expenses}")
+
+    # Compare weekly expenses with budget from user input
+    if summary.over_budget:
+        print(f"Warning: Weekly expenses ({summary.total_expenses:.2f}) exceed the budget ({summary.weekly_budget:.2f}).")
+    else:
+        print(f"Weekly expenses ({summary.total_expenses:.2f}) are within the budget ({summary.weekly_budget:.2f}).")
+
+    print(f"Total Monthly Income: {summary.total_income:.2f}")
+    if summary.total_income <= 0:
+        return "Total income is zero or negative, cannot calculate savings."
+
+    print(f"Monthly Savings: {summary.monthly_savings:.2f}")
+
+    tax_year = user_input.get('tax_year', '2023')
+    print(f"Estimated Tax Due for {tax_year}: {summary.tax_due:.2f}")
+    return summary.as_dict()
+
+
 def manipulate_data(df_expenses, df_income, user_input):
     """
     Expense Data Columns:
@@ -10,61 +167,30 @@ def manipulate_data(df_expenses, df_income, user_input):
     if df_expenses.empty and df_income.empty:
         return "No data available to process."
 
-    # Example: Calculate total weekly expenses
     if 'Amount' not in df_expenses.columns:
         return "Column 'Amount' not found in expense data."
-    # calculate weekly expenses
-    df_expenses['Date'] = pd.to_datetime(df_expenses['Date'], errors='coerce')
-    df_expenses['Week'] = df_expenses['Date'].dt.isocalendar().week
-    weekly_expenses = df_expenses.groupby('Week')['Amount'].sum()
-    print(f"Weekly Expenses:\n{weekly_expenses}")
+    if 'Date' not in df_expenses.columns:
+        return "Required columns not found in expense data."
+    if 'Amount' not in df_income.columns or 'Date' not in df_income.columns:
+        return "Column 'Amount' not found in income data."
 
-    #Compare weekly expenses with budget from user input
-    weekly_budget = user_input.get('weekly_budget', 0)
-    try:
-        weekly_budget = float(weekly_budget)
-    except (ValueError, TypeError):
-        weekly_budget = 0
-        print("Warning: Invalid weekly budget, using 0.")
-    
-    total_weekly_expenses = weekly_expenses.sum()
-    if total_weekly_expenses > weekly_budget:
-        print(f"Warning: Weekly expenses ({total_weekly_expenses:.2f}) exceed the budget ({weekly_budget:.2f}).")
-    else:
-        print(f"Weekly expenses ({total_weekly_expenses:.2f}) are within the budget ({weekly_budget:.2f}).")
+    summary = summarize(df_expenses, df_income, parse_weekly_budget(user_input))
+    return report_summary(summary, user_input)
 
-    # Calculate Monthly income
-    if 'Amount' not in df_income.columns:
-        return "Column 'Amount' not found in income data."
-    df_income['Date'] = pd.to_datetime(df_income['Date'], errors='coerce')
-    df_income['Month'] = df_income['Date'].dt.to_period('M')
-    monthly_income = df_income.groupby('Month')['Amount'].sum()
-    total_monthly_income = monthly_income.sum()
-    print(f"Total Monthly Income: {total_monthly_income:.2f}")
-    if total_monthly_income <= 0:
-        return "Total income is zero or negative, cannot calculate savings."
-    
-    #Calculate monthly savings
-    if 'Date' not in df_expenses.columns or 'Amount' not in df_expenses.columns:
-        return "Required columns not found in expense data."    
-    df_expenses['Month'] = df_expenses['Date'].dt.to_period('M')
-    monthly_expenses = df_expenses.groupby('Month')['Amount'].sum()
-    monthly_savings = total_monthly_income - monthly_expenses.sum()
-    print(f"Monthly Savings: {monthly_savings:.2f}")
-
-    # Get user details for tax calculation
-    tax_year = user_input.get('tax_year', '2023')
-    tax_class = user_input.get('tax_class', 'I')
-    religious_status = user_input.get('religious_status', 'None')
-    
-    tax_rate = 0.25  # Example tax rate, can be adjusted based on tax class and religious status
-    total_taxable_income = total_monthly_income * 12  # Annual income
-    tax_due = total_taxable_income * tax_rate   
-    print(f"Estimated Tax Due for {tax_year}: {tax_due:.2f}")
-    return {
-        "weekly_expenses": weekly_expenses,
-        "monthly_income": monthly_income,
-        "monthly_savings": monthly_savings,
-        "tax_due": tax_due,
-        "total_expenses": total_weekly_expenses
-    }
+
+def aggregate_csv_chunks(expense_chunks, income_chunks):
+    """
+    Fold typed chunks from fetch_csv.iter_csv_chunks into weekly expense and
+    monthly income totals, keeping only the running aggregates in memory.
+    """
+    weekly_expenses = pd.Series(dtype='float64')
+    for chunk in expense_chunks:
+        weekly, _ = aggregate_by_period(chunk['Date'], chunk['Amount'])
+        weekly_expenses = weekly.add(weekly_expenses, fill_value=0) if len(weekly_expenses) else weekly
+
+    monthly_income = pd.Series(dtype='float64')
+    for chunk in income_chunks:
+        _, monthly = aggregate_by_period(chunk['Date'], chunk['Amount'])
+        monthly_income = monthly.add(monthly_income, fill_value=0) if len(monthly_income) else monthly
+
+    return weekly_expenses.sort_index(), monthly_income.sort_index()
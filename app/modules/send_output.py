@@ -1,5 +1,4 @@
 # send the results to the user
-import pandas as pd
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -71,6 +70,19 @@ def save_user_config(user_info):
     except Exception as e:
         print(f"Warning: Could not save user config: {e}")
 
+_report_template = None
+
+def _get_report_template():
+    """Compile the email report template once and reuse it"""
+    global _report_template
+    if _report_template is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        template_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+        env = Environment(loader=FileSystemLoader(template_dir), autoescape=select_autoescape(['html']),
+                          trim_blocks=True, lstrip_blocks=True)
+        _report_template = env.get_template('email_report.html')
+    return _report_template
+
 def send_email_alert(user_info, result, total_expenses, budget):
     """Send email alert with results"""
     try:
@@ -86,80 +98,27 @@ def send_email_alert(user_info, result, total_expenses, budget):
         msg["From"] = sender_email
         msg["To"] = user_info.get('email')
         
-        # Create HTML content
+        # Create HTML content from the compiled report template
         status = "Budget Exceeded ⚠️" if total_expenses > budget else "Within Budget ✅"
         status_color = "#e74c3c" if total_expenses > budget else "#27ae60"
         
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: {status_color}; text-align: center;">
-                    ExpenseTracker Report
-                </h2>
-                
-                <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3>Hello {user_info.get('name', 'User')}!</h3>
-                    
-                    <div style="background-color: {status_color}; color: white; padding: 15px; border-radius: 5px; text-align: center; margin: 15px 0;">
-                        <h3 style="margin: 0;">{status}</h3>
-                    </div>
-                    
-                    <table style="width: 100%; border-collapse: collapse; margin: 20px 0;">
-                        <tr style="background-color: #e9ecef;">
-                            <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Total Expenses:</td>
-                            <td style="padding: 10px; border: 1px solid #ddd;">€{total_expenses:.2f}</td>
-                        </tr>
-                        <tr>
-                            <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Weekly Budget:</td>
-                            <td style="padding: 10px; border: 1px solid #ddd;">€{budget:.2f}</td>
-                        </tr>
-                        <tr style="background-color: #e9ecef;">
-                            <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Difference:</td>
-                            <td style="padding: 10px; border: 1px solid #ddd; color: {status_color};">
-                                €{total_expenses - budget:.2f}
-                            </td>
-                        </tr>
-        """
-        
-        # Add monthly data if available
+        monthly_income = monthly_savings = tax_due = None
         if isinstance(result, dict):
             if 'monthly_income' in result:
                 monthly_income = result['monthly_income'].sum() if hasattr(result['monthly_income'], 'sum') else 0
-                html_content += f"""
-                        <tr>
-                            <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Monthly Income:</td>
-                            <td style="padding: 10px; border: 1px solid #ddd;">€{monthly_income:.2f}</td>
-                        </tr>
-                """
-            
-            if 'monthly_savings' in result:
-                html_content += f"""
-                        <tr style="background-color: #e9ecef;">
-                            <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Monthly Savings:</td>
-                            <td style="padding: 10px; border: 1px solid #ddd;">€{result['monthly_savings']:.2f}</td>
-                        </tr>
-                """
-            
-            if 'tax_due' in result:
-                html_content += f"""
-                        <tr>
-                            <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Estimated Tax:</td>
-                            <td style="padding: 10px; border: 1px solid #ddd;">€{result['tax_due']:.2f}</td>
-                        </tr>
-                """
-        
-        html_content += """
-                    </table>
-                </div>
-                
-                <p style="text-align: center; color: #666; font-size: 12px;">
-                    This is an automated message from your ExpenseTracker system.
-                </p>
-            </div>
-        </body>
-        </html>
-        """
+            monthly_savings = result.get('monthly_savings')
+            tax_due = result.get('tax_due')
+        
+        html_content = _get_report_template().render(
+            name=user_info.get('name', 'User'),
+            status=status,
+            status_color=status_color,
+            total_expenses=total_expenses,
+            budget=budget,
+            monthly_income=monthly_income,
+            monthly_savings=monthly_savings,
+            tax_due=tax_due,
+        )
         
         # Attach HTML content
         html_part = MIMEText(html_content, "html")
@@ -182,8 +141,12 @@ def send_email_alert(user_info, result, total_expenses, budget):
         print(f"Error sending email: {e}")
 
 # Simple automation functions using your existing pipeline
-def setup_automation():
-    """Setup automated weekly and monthly alerts"""
+def setup_automation(incremental=True):
+    """Setup automated weekly and monthly alerts
+
+    With ``incremental`` each run only parses rows appended to the CSV files
+    since the previous run (see modules.incremental).
+    """
     try:
         import schedule
         import time
@@ -194,12 +157,21 @@ def setup_automation():
             print("� Running weekly automated check...")
             try:
                 from modules.fetch_csv import read_csv_data
-                from modules.process_data import manipulate_data
+                from modules.process_data import manipulate_data, parse_weekly_budget, report_summary
+                from modules.incremental import summarize_files
                 
                 # Load user config
                 with open('config/user_config.json', 'r') as f:
                     user_info = json.load(f)
                 
+                if incremental:
+                    summary = summarize_files("data/Expenses.csv", "data/Income.csv",
+                                              parse_weekly_budget(user_info))
+                    if not summary.weekly_expenses.empty:
+                        result = report_summary(summary, user_info)
+                        send_result(user_info, result)
+                    return
+                
                 # Load and process data
                 expense_data = read_csv_data("data/Expenses.csv")
                 income_data = read_csv_data("data/Income.csv")
@@ -0,0 +1,72 @@
+"""
+Email render throughput benchmark.
+
+Renders alert emails for synthetic users through the compiled templates
+and reports messages per second for single and batch rendering.
+
+    python -m benchmarks.bench_email_render [--users 5000]
+"""
+
+import argparse
+import random
+import time
+
+from src.email_templates import get_renderer
+
+
+def synthetic_summaries(count, seed=42):
+    rng = random.Random(seed)
+    for user_id in range(1, count + 1):
+        monthly_expenses = rng.uniform(100, 5000)
+        monthly_income = rng.uniform(1000, 6000)
+        user_info = {
+            'id': user_id,
+            'email': f'user{user_id}@example.com',
+            'name': f'User {user_id}',
+            'budget': rng.choice([0, 500, 1000, 2500])
+        }
+        result = {
+            'weekly_expenses': monthly_expenses / 4,
+            'monthly_expenses': monthly_expenses,
+            'monthly_income': monthly_income,
+            'monthly_savings': monthly_income - monthly_expenses,
+            'total_expenses': monthly_expenses * 12,
+            'total_income': monthly_income * 12
+        }
+        yield user_info, result
+
+
+def run(users):
+    renderer = get_renderer()
+    summaries = list(synthetic_summaries(users))
+
+    start = time.perf_counter()
+    for user_info, result in summaries:
+        renderer.build_message(user_info, result, result['total_expenses'], user_info['budget'])
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    messages = renderer.render_batch(summaries)
+    batch = time.perf_counter() - start
+
+    assert len(messages) == users
+    return {
+        'users': users,
+        'single_msgs_per_sec': users / single,
+        'batch_msgs_per_sec': users / batch,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark alert email rendering')
+    parser.add_argument('--users', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    stats = run(args.users)
+    print(f"📧 Rendered {stats['users']} alert emails")
+    print(f"   build_message: {stats['single_msgs_per_sec']:,.0f} msgs/sec")
+    print(f"   render_batch:  {stats['batch_msgs_per_sec']:,.0f} msgs/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Analytics kernel benchmark: process_data.summarize vs the legacy
+manipulate_data implementation on synthetic Expenses/Income frames.
+
+    python -m benchmarks.bench_process_data [--rows 10000000]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'app'))
+
+from modules.process_data import summarize  # noqa: E402
+
+
+def legacy_manipulate_data(df_expenses, df_income, user_input):
+    """The pre-kernel implementation, kept here as the comparison baseline"""
+    df_expenses['Date'] = pd.to_datetime(df_expenses['Date'], errors='coerce')
+    df_expenses['Week'] = df_expenses['Date'].dt.isocalendar().week
+    weekly_expenses = df_expenses.groupby('Week')['Amount'].sum()
+    total_weekly_expenses = weekly_expenses.sum()
+    df_income['Date'] = pd.to_datetime(df_income['Date'], errors='coerce')
+    df_income['Month'] = df_income['Date'].dt.to_period('M')
+    monthly_income = df_income.groupby('Month')['Amount'].sum()
+    total_monthly_income = monthly_income.sum()
+    df_expenses['Month'] = df_expenses['Date'].dt.to_period('M')
+    monthly_expenses = df_expenses.groupby('Month')['Amount'].sum()
+    return {
+        "weekly_expenses": weekly_expenses,
+        "monthly_income": monthly_income,
+        "monthly_savings": total_monthly_income - monthly_expenses.sum(),
+        "tax_due": total_monthly_income * 12 * 0.25,
+        "total_expenses": total_weekly_expenses
+    }
+
+
+def synthetic_frames(rows, seed=42, years=5):
+    """Expenses/Income frames with m/d/Y text dates, like the CSV exports"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2021-01-01')
+
+    def frame(n):
+        days = start + rng.integers(0, 365 * years, n).astype('timedelta64[D]')
+        # Format each distinct day once, then fan out: rows share few dates
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        labels = pd.DatetimeIndex(unique_days).strftime('%-m/%-d/%Y').to_numpy()
+        return pd.DataFrame({'Date': labels[inverse], 'Amount': rng.random(n) * 200})
+
+    return frame(rows), frame(max(1, rows // 20))
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(rows):
+    expenses, income = synthetic_frames(rows)
+
+    legacy_time, legacy = _time(legacy_manipulate_data, expenses.copy(), income.copy(), {})
+    kernel_time, summary = _time(summarize, expenses, income, 0.0)
+
+    assert np.isclose(legacy['total_expenses'], summary.total_expenses)
+    assert np.isclose(legacy['monthly_savings'], summary.monthly_savings)
+    return {
+        'rows': rows,
+        'legacy_seconds': legacy_time,
+        'kernel_seconds': kernel_time,
+        'speedup': legacy_time / kernel_time,
+        'kernel_rows_per_sec': rows / kernel_time,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the process_data analytics kernel')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    args = parser.parse_args(argv)
+
+    stats = run(args.rows)
+    print(f"📊 {stats['rows']:,} expense rows")
+    print(f"   legacy manipulate_data: {stats['legacy_seconds']:.2f}s")
+    print(f"   summarize kernel:       {stats['kernel_seconds']:.2f}s "
+          f"({stats['speedup']:.1f}x, {stats['kernel_rows_per_sec']:,.0f} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Cold-start import budget for start_app.py.
+
+Imports the modules start_app.py loads before it can serve (the web app,
+the automation system and the scheduler election) in a fresh interpreter
+under ``python -X importtime``. Exits non-zero if the cumulative import time
+exceeds the budget or if a heavy dependency that belongs on a lazy path
+(pandas, numpy, schedule) is pulled in, so CI catches startup regressions.
+
+    python -m benchmarks.check_startup_time [--budget-ms 500] [--runs 3]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP_MODULES = ('start_app', 'src.webapp', 'src.automation', 'src.leader')
+
+# Only loaded on the paths that need them (legacy pandas summaries, the CLI pipeline)
+FORBIDDEN_MODULES = ('pandas', 'numpy', 'schedule')
+
+DEFAULT_BUDGET_MS = 500
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def measure(modules=STARTUP_MODULES):
+    """Return ({top-level module: cumulative us}, {every imported module: self us})"""
+    code = '; '.join(f'import {module}' for module in modules)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing the startup modules failed:\n{proc.stderr}")
+
+    top_level, self_times = {}, {}
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        self_times[name] = int(self_us)
+        if not indent:
+            top_level[name] = int(cumulative_us)
+    return top_level, self_times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the start_app.py import-time budget')
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--runs', type=int, default=3, help='keep the fastest of N runs')
+    parser.add_argument('--top', type=int, default=10, help='list the N slowest modules')
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(max(1, args.runs))]
+    top_level, self_times = min(runs, key=lambda run: sum(run[0].values()))
+    total_ms = sum(top_level.values()) / 1000
+
+    print(f"⏱️ Startup imports: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {len(runs)})")
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {us / 1000:8.1f} ms  {name}")
+    print("   slowest modules (self time):")
+    for name, us in sorted(self_times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    heavy = sorted(name for name in FORBIDDEN_MODULES if name in self_times)
+    if heavy:
+        failures.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"startup imports take {total_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        return 1
+    print("✅ Startup import budget met")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
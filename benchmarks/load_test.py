@@ -0,0 +1,353 @@
+"""
+End-to-end concurrent load test.
+
+Starts the app through ``start_app.py`` (or ``start_app.py --production``)
+on a scratch database and drives it with N simulated users. Each user
+registers, logs in, then loops posting expenses and income and polling
+``/dashboard`` (revalidating with its ETag like a browser). Halfway through,
+a weekly alert run is started in a separate process against the same
+database file, with email enabled and delivered to a local SMTP sink, so
+the outbox writes contend with the web traffic.
+
+Reports p50/p95/p99 latency, error rate and "database is locked" failures
+per route, plus the alert run's duration and lock errors.
+
+    python -m benchmarks.load_test --users 50 --duration 60 [--production]
+
+All simulated users share 127.0.0.1, so the per-IP login limit is raised for
+the server under test; everything else runs with the app's own settings.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import re
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LOCKED = 'database is locked'
+# Flask logs "Exception on /path [METHOD]" followed by the traceback
+EXCEPTION_LINE = re.compile(r'Exception on (\S+) \[(\w+)\]')
+READY_TIMEOUT = 60
+
+ALERT_RUN_CODE = (
+    "from src.automation import deliver_alerts; "
+    "deliver_alerts('Weekly Summary', 'weekly alert')"
+)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept and discard every message"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 sink ready')
+        in_data = False
+        for raw in self.rfile:
+            line = raw.rstrip(b'\r\n')
+            if in_data:
+                if line == b'.':
+                    in_data = False
+                    self.server.messages += 1
+                    self.reply('250 queued')
+                continue
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply('250 sink')
+            elif command == b'DATA':
+                in_data = True
+                self.reply('354 end with .')
+            elif command == b'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SinkHandler)
+        self.messages = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None  # surface 302s as responses, like a browser's network tab
+
+
+class Stats:
+    """Latency samples and failures per route, shared by every simulated user"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, status, ok):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] += 1
+            if not ok:
+                self.errors[route] += 1
+
+
+class SimulatedUser:
+    def __init__(self, base_url, index, stats, think_seconds):
+        self.base_url = base_url
+        self.email = f'load{index}@example.com'
+        self.stats = stats
+        self.think_seconds = think_seconds
+        self.etag = None
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect
+        )
+
+    def request(self, method, path, form=None, expect=(200,), headers=None):
+        route = f'{method} {path}'
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers or {})
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                response.read()
+                status, response_headers = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, response_headers = e.code, e.headers
+        except OSError:
+            status, response_headers = 'conn-error', {}
+        self.stats.record(route, time.perf_counter() - start, status, status in expect)
+        return status, response_headers
+
+    def sign_up(self):
+        self.request('POST', '/register', {
+            'email': self.email, 'password': 'password', 'name': self.email, 'budget': '500'
+        }, expect=(302,))
+        status, _ = self.request('POST', '/login', {'email': self.email, 'password': 'password'},
+                                 expect=(302,))
+        return status == 302
+
+    def step(self, n):
+        day = f'2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}'
+        self.request('POST', '/add_expense', {
+            'amount': '12.50', 'category': 'Food & Dining', 'description': 'load', 'date': day
+        }, expect=(302,))
+        if n % 4 == 0:
+            self.request('POST', '/add_income', {
+                'amount': '900', 'source': 'Salary', 'description': 'load', 'date': day
+            }, expect=(302,))
+        for _ in range(2):
+            headers = {'If-None-Match': self.etag} if self.etag else {}
+            status, response_headers = self.request('GET', '/dashboard', expect=(200, 304), headers=headers)
+            self.etag = response_headers.get('ETag') or self.etag
+
+    def run(self, deadline):
+        if not self.sign_up():
+            return
+        n = 0
+        while time.monotonic() < deadline:
+            self.step(n)
+            n += 1
+            if self.think_seconds:
+                time.sleep(self.think_seconds)
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    rank = max(1, round(p / 100 * len(samples) + 0.5))
+    return samples[min(rank, len(samples)) - 1]
+
+
+def count_locked_by_route(log_text):
+    """Attribute 'database is locked' tracebacks in the server log to the route that raised them"""
+    locked = defaultdict(int)
+    route = None
+    for line in log_text.splitlines():
+        match = EXCEPTION_LINE.search(line)
+        if match:
+            route = f'{match.group(2)} {match.group(1)}'
+        elif LOCKED in line and route:
+            locked[route] += 1
+            route = None
+    return locked
+
+
+def wait_until_ready(base_url, server):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('the app exited during startup; see the server log')
+        try:
+            with urllib.request.urlopen(base_url + '/login', timeout=2):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f'the app did not answer within {READY_TIMEOUT}s')
+
+
+def run_alerts(env, result):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', ALERT_RUN_CODE], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    output = proc.stdout + proc.stderr
+    result.update(
+        seconds=time.perf_counter() - start,
+        returncode=proc.returncode,
+        locked=output.count(LOCKED),
+        output_tail=output.strip().splitlines()[-5:],
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test ExpenseTracker end to end')
+    parser.add_argument('--users', type=int, default=20, help='concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of traffic after sign-up')
+    parser.add_argument('--think', type=float, default=0.0, help='pause between user iterations')
+    parser.add_argument('--production', action='store_true', help='serve with gunicorn')
+    parser.add_argument('--preload-users', type=int, default=0,
+                        help='start from a synthetic database with this many users')
+    parser.add_argument('--preload-transactions', type=int, default=0)
+    parser.add_argument('--no-alerts', action='store_true', help='skip the mid-test alert run')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database and server log')
+    parser.add_argument('--output', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    workdir = Path(tempfile.mkdtemp(prefix='expensetracker-load-'))
+    db_path = workdir / 'load.db'
+    if args.preload_users:
+        from benchmarks.synthetic import generate_database
+        generate_database(str(db_path), args.preload_users, args.preload_transactions)
+
+    sink = SMTPSink()
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_PATH=str(db_path),
+        PORT=str(port),
+        PYTHONUNBUFFERED='1',
+        SCHEDULER_MODE='off',  # the harness triggers the alert run itself
+        EMAIL_ENABLED='false',
+        LOGIN_ATTEMPTS_PER_IP=str(max(1000, args.users * 10)),
+    )
+    alert_env = dict(
+        env,
+        EMAIL_ENABLED='true',
+        SMTP_SERVER='127.0.0.1',
+        SMTP_PORT=str(sink.port),
+        SMTP_USE_TLS='false',
+        SENDER_PASSWORD='',
+        EMAIL_RATE_LIMIT='1000',
+    )
+
+    log_path = workdir / 'server.log'
+    command = [sys.executable, 'start_app.py'] + (['--production'] if args.production else [])
+    with open(log_path, 'w') as log:
+        server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{port}'
+    stats = Stats()
+    alert_result = {}
+    try:
+        wait_until_ready(base_url, server)
+        print(f"🚦 {args.users} users for {args.duration:.0f}s against {base_url} "
+              f"({'gunicorn' if args.production else 'flask dev server'})")
+
+        deadline = time.monotonic() + args.duration
+        users = [SimulatedUser(base_url, i, stats, args.think) for i in range(args.users)]
+        threads = [threading.Thread(target=user.run, args=(deadline,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        alerts = None
+        if not args.no_alerts:
+            time.sleep(max(0.0, deadline - time.monotonic()) / 2)
+            print("🔔 Triggering a weekly alert run mid-test")
+            alerts = threading.Thread(target=run_alerts, args=(alert_env, alert_result))
+            alerts.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if alerts:
+            alerts.join()
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        sink.shutdown()
+
+    locked = count_locked_by_route(log_path.read_text(errors='replace'))
+    report = {'users': args.users, 'seconds': elapsed, 'production': args.production, 'routes': {}}
+    print(f"\n{'route':<22}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'locked':>8}")
+    for route in sorted(stats.latencies):
+        samples = sorted(stats.latencies[route])
+        row = {
+            'requests': len(samples),
+            'per_second': len(samples) / elapsed,
+            'p50_ms': percentile(samples, 50) * 1000,
+            'p95_ms': percentile(samples, 95) * 1000,
+            'p99_ms': percentile(samples, 99) * 1000,
+            'error_rate': stats.errors[route] / len(samples),
+            'locked': locked.get(route, 0),
+            'statuses': {str(status): n for status, n in stats.statuses[route].items()},
+        }
+        report['routes'][route] = row
+        print(f"{route:<22}{row['requests']:>9}{row['per_second']:>8.1f}{row['p50_ms']:>9.1f}"
+              f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['error_rate']:>8.1%}{row['locked']:>8}")
+
+    if alert_result:
+        report['alert_run'] = dict(alert_result, emails_delivered=sink.messages)
+        print(f"\n🔔 Alert run: {alert_result['seconds']:.1f}s, exit {alert_result['returncode']}, "
+              f"{sink.messages} emails delivered, {alert_result['locked']} lock errors")
+        if alert_result['returncode'] != 0:
+            print('\n'.join('   ' + line for line in alert_result['output_tail']))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"💾 Report written to {args.output}")
+    if args.keep:
+        print(f"📁 Database and server log kept in {workdir}")
+    else:
+        for path in workdir.iterdir():
+            path.unlink()
+        workdir.rmdir()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
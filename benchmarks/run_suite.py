@@ -0,0 +1,287 @@
+"""
+End-to-end benchmark suite on seeded synthetic data.
+
+Builds (or reuses) a synthetic database and CSV pair, then times the hot
+paths: the dashboard (cold and cached), add_expense, the legacy pandas
+calculate_financial_summary, the CSV manipulate_data pipeline and
+send_email_alert. Each benchmark reports throughput (best of ``--repeat``)
+and the peak Python memory of one extra traced pass.
+
+The cached database is never written to: every run works on a fresh copy
+(add_expense inserts rows), so repeated runs see identical data.
+
+Results are written as JSON; pass an earlier file as ``--baseline`` to
+print the change per benchmark and exit non-zero on regressions.
+
+    python -m benchmarks.run_suite --users 10000 --transactions 5000000 \\
+        --csv-rows 5000000 --output results.json [--baseline baseline.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'app'))
+
+from benchmarks.synthetic import generate_csvs, generate_database  # noqa: E402
+from modules.process_data import manipulate_data  # noqa: E402
+from src.automation import calculate_financial_summary, get_user_data, get_user_summary  # noqa: E402
+from src.dashboard_cache import dashboard_cache  # noqa: E402
+from src.database import configure, get_pool  # noqa: E402
+from src.email_service import send_email_alert  # noqa: E402
+from src.webapp import app  # noqa: E402
+
+DEFAULT_MAX_REGRESSION = 10.0  # percent
+
+
+def _client(user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+
+def bench_dashboard(ctx, cached=False):
+    clients = [_client(user_id) for user_id in ctx['user_ids']]
+
+    def run():
+        for client in clients:
+            if not cached:
+                dashboard_cache.invalidate()
+            response = client.get('/dashboard')
+            assert response.status_code == 200, response.status_code
+        return len(clients)
+
+    if cached:
+        run()  # prime the cache
+    return run, 'requests'
+
+
+def bench_dashboard_cached(ctx):
+    return bench_dashboard(ctx, cached=True)
+
+
+def bench_add_expense(ctx):
+    clients = [_client(user_id) for user_id in ctx['user_ids']]
+    form = {'amount': '12.50', 'category': 'Food & Dining', 'description': 'bench', 'date': '2024-06-01'}
+
+    def run():
+        for client in clients:
+            response = client.post('/add_expense', data=form)
+            assert response.status_code == 302, response.status_code
+        return len(clients)
+
+    return run, 'requests'
+
+
+def bench_calculate_financial_summary(ctx):
+    def run():
+        for user_id in ctx['user_ids']:
+            _, expenses_df, income_df = get_user_data(user_id)
+            calculate_financial_summary(expenses_df, income_df)
+        return len(ctx['user_ids'])
+
+    return run, 'users'
+
+
+def bench_manipulate_data(ctx):
+    df_expenses = pd.read_csv(ctx['expenses_csv'])
+    df_income = pd.read_csv(ctx['income_csv'])
+    user_input = {'weekly_budget': '500', 'tax_year': '2024'}
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            manipulate_data(df_expenses, df_income, user_input)
+        return len(df_expenses) + len(df_income)
+
+    return run, 'rows'
+
+
+def bench_send_email_alert(ctx):
+    summaries = [get_user_summary(user_id) for user_id in ctx['user_ids']]
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for user_info, result in summaries:
+                send_email_alert(user_info, result, result['total_expenses'], user_info['budget'])
+        return len(summaries)
+
+    return run, 'messages'
+
+
+BENCHMARKS = {
+    'dashboard': bench_dashboard,
+    'dashboard_cached': bench_dashboard_cached,
+    'add_expense': bench_add_expense,
+    'calculate_financial_summary': bench_calculate_financial_summary,
+    'manipulate_data': bench_manipulate_data,
+    'send_email_alert': bench_send_email_alert,
+}
+
+
+def working_copy(db_path):
+    """Copy the cached benchmark database to a scratch file this run may modify"""
+    copy_path = db_path.with_name(f'{db_path.stem}-run.db')
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{copy_path}{suffix}').unlink(missing_ok=True)
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(copy_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return copy_path
+
+
+def measure(setup, ctx, repeat):
+    """Return throughput (best of ``repeat``) and the peak traced memory of one more pass"""
+    run, unit = setup(ctx)
+    best = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        ops = run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[1]:
+            best = (ops, elapsed)
+
+    # Tracing slows Python code down, so memory gets its own pass
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ops, elapsed = best
+    return {
+        'ops': ops,
+        'unit': unit,
+        'seconds': elapsed,
+        'ops_per_sec': ops / elapsed if elapsed else 0.0,
+        'peak_memory_mb': peak / 2**20,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, max_regression):
+    """Print the change against a baseline run; returns the names that regressed"""
+    regressions = []
+    print(f"\n📊 Compared with baseline from {baseline['meta'].get('timestamp', '?')} "
+          f"({baseline['meta'].get('commit') or 'unknown commit'})")
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['ops_per_sec']:
+            print(f"   {name:<28} (no baseline)")
+            continue
+        speed = (current['ops_per_sec'] / previous['ops_per_sec'] - 1) * 100
+        memory = current['peak_memory_mb'] - previous['peak_memory_mb']
+        flag = ''
+        if speed < -max_regression:
+            regressions.append(name)
+            flag = '  ❌ regression'
+        print(f"   {name:<28} {speed:+7.1f}% throughput  {memory:+8.1f} MB peak{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the ExpenseTracker benchmark suite')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=100_000)
+    parser.add_argument('--csv-rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sample', type=int, default=200, help='users exercised per benchmark pass')
+    parser.add_argument('--repeat', type=int, default=3, help='keep the fastest of N timed passes')
+    parser.add_argument('--data-dir', default='bench_data', help='where the synthetic data is kept')
+    parser.add_argument('--regenerate', action='store_true', help='rebuild data even if it exists')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='run a subset')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                        help='percent throughput drop that fails the comparison')
+    args = parser.parse_args(argv)
+
+    # Never send real mail from a benchmark
+    os.environ['EMAIL_ENABLED'] = 'false'
+
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    db_path = data_dir / f"bench-{args.users}u-{args.transactions}t-s{args.seed}.db"
+    csv_dir = data_dir / f"csv-{args.csv_rows}r-s{args.seed}"
+    if args.regenerate or not db_path.exists():
+        print(f"🗄️ Generating {db_path} ...")
+        generate_database(str(db_path), args.users, args.transactions, args.seed)
+    if args.regenerate or not (csv_dir / 'Expenses.csv').exists():
+        print(f"📄 Generating {csv_dir} ...")
+        generate_csvs(str(csv_dir), args.csv_rows, args.seed)
+    run_db_path = working_copy(db_path)
+    configure(path=str(run_db_path))
+
+    rng = random.Random(args.seed)
+    ctx = {
+        'user_ids': rng.sample(range(1, args.users + 1), min(args.sample, args.users)),
+        'expenses_csv': str(csv_dir / 'Expenses.csv'),
+        'income_csv': str(csv_dir / 'Income.csv'),
+    }
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"⏱️ {name} ...", end=' ', flush=True)
+        results[name] = stats = measure(BENCHMARKS[name], ctx, args.repeat)
+        print(f"{stats['ops_per_sec']:,.0f} {stats['unit']}/sec, peak {stats['peak_memory_mb']:.1f} MB")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'users': args.users,
+            'transactions': args.transactions,
+            'csv_rows': args.csv_rows,
+            'seed': args.seed,
+            'sample': len(ctx['user_ids']),
+            'repeat': args.repeat,
+            # ru_maxrss is KiB on Linux
+            'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        'results': results,
+    }
+    get_pool().close_all()
+    for suffix in ('', '-wal', '-shm'):
+        Path(f'{run_db_path}{suffix}').unlink(missing_ok=True)
+
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"💾 Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if compare(results, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Seeded synthetic data for benchmarks and load tests.
+
+Builds a migrated SQLite database (users, expenses, income and rollups) or a
+pair of Expenses.csv / Income.csv files in the documented layouts. The same
+seed and scale always produce the same data.
+
+    python -m benchmarks.synthetic db bench.db --users 10000 --transactions 5000000
+    python -m benchmarks.synthetic csv bench_data --rows 1000000
+
+Every synthetic user has the password ``password``.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+from werkzeug.security import generate_password_hash
+
+from src.migrations import apply_migrations
+from src.rollups import rebuild_rollups
+
+START_DATE = np.datetime64('2022-01-01')
+DEFAULT_DAYS = 3 * 365
+INCOME_SHARE = 0.1  # one transaction in ten is income
+INSERT_CHUNK = 250_000
+PASSWORD = 'password'
+
+EXPENSE_CATEGORIES = np.array(['Food & Dining', 'Transportation', 'Business', 'Groceries',
+                               'Utilities', 'Entertainment', 'Health', 'Shopping'])
+PAYMENT_METHODS = np.array(['Credit Card', 'Debit Card', 'Cash', 'Bank Transfer'])
+VENDORS = np.array(['Starbucks', 'Shell', 'Adobe', 'Safeway', 'PG&E', 'Netflix', 'CVS', 'Amazon'])
+INCOME_SOURCES = np.array(['Salary', 'Freelance', 'Investments', 'Rental', 'Other'])
+INCOME_TYPES = np.array(['Recurring', 'One-time'])
+
+
+def _dates(rng, n, days):
+    return START_DATE + rng.integers(0, days, n).astype('timedelta64[D]')
+
+
+def _date_labels(days, fmt):
+    """Format each distinct day once, then fan out to every row"""
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    return pd.DatetimeIndex(unique_days).strftime(fmt).to_numpy()[inverse]
+
+
+def generate_database(path, users=1000, transactions=100_000, seed=42, days=DEFAULT_DAYS):
+    """Create a fresh, migrated database at ``path`` and return its row counts"""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_migrations(conn)
+    # Bulk load: durability does not matter for a throwaway database
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+
+    password_hash = generate_password_hash(PASSWORD)
+    budgets = rng.choice([0, 250, 500, 1000, 2500], users)
+    conn.execute('BEGIN')
+    conn.executemany(
+        'INSERT INTO users (id, email, password_hash, name, budget) VALUES (?, ?, ?, ?, ?)',
+        ((i, f'user{i}@example.com', password_hash, f'User {i}', float(budgets[i - 1]))
+         for i in range(1, users + 1))
+    )
+    conn.execute('COMMIT')
+
+    income_rows = int(transactions * INCOME_SHARE)
+    plans = (
+        ('expenses', 'category', transactions - income_rows, EXPENSE_CATEGORIES, 5, 150),
+        ('income', 'source', income_rows, INCOME_SOURCES, 200, 3000),
+    )
+    for table, category_col, total, categories, low, high in plans:
+        for offset in range(0, total, INSERT_CHUNK):
+            n = min(INSERT_CHUNK, total - offset)
+            rows = zip(
+                rng.integers(1, users + 1, n).tolist(),
+                np.round(rng.uniform(low, high, n), 2).tolist(),
+                categories[rng.integers(0, len(categories), n)].tolist(),
+                _date_labels(_dates(rng, n, days), '%Y-%m-%d').tolist(),
+            )
+            conn.execute('BEGIN')
+            conn.executemany(
+                f"INSERT INTO {table} (user_id, amount, {category_col}, description, date) "
+                f"VALUES (?, ?, ?, 'synthetic', ?)",
+                rows
+            )
+            conn.execute('COMMIT')
+
+    rebuild_rollups(conn)
+    conn.execute('ANALYZE')
+    conn.close()
+    return {'users': users, 'expenses': transactions - income_rows, 'income': income_rows}
+
+
+def expense_frame(rows, seed=42, days=DEFAULT_DAYS):
+    """An Expenses.csv-shaped DataFrame with m/d/Y text dates"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': _date_labels(_dates(rng, rows, days), '%-m/%-d/%Y'),
+        'Category': EXPENSE_CATEGORIES[rng.integers(0, len(EXPENSE_CATEGORIES), rows)],
+        'Amount': np.round(rng.uniform(5, 150, rows), 2),
+        'Description': 'synthetic',
+        'Payment_Method': PAYMENT_METHODS[rng.integers(0, len(PAYMENT_METHODS), rows)],
+        'Vendor': VENDORS[rng.integers(0, len(VENDORS), rows)],
+    })
+
+
+def income_frame(rows, seed=42, days=DEFAULT_DAYS):
+    """An Income.csv-shaped DataFrame with m/d/Y text dates"""
+    rng = np.random.default_rng(seed + 1)
+    return pd.DataFrame({
+        'Date': _date_labels(_dates(rng, rows, days), '%-m/%-d/%Y'),
+        'Amount': np.round(rng.uniform(200, 3000, rows), 2),
+        'Source': INCOME_SOURCES[rng.integers(0, len(INCOME_SOURCES), rows)],
+        'Type': INCOME_TYPES[rng.integers(0, len(INCOME_TYPES), rows)],
+        'Notes': 'synthetic',
+    })
+
+
+def generate_csvs(directory, rows=100_000, seed=42, days=DEFAULT_DAYS):
+    """Write Expenses.csv and Income.csv into ``directory``; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    expenses_path = os.path.join(directory, 'Expenses.csv')
+    income_path = os.path.join(directory, 'Income.csv')
+    expense_frame(rows, seed, days).to_csv(expenses_path, index=False)
+    income_frame(max(1, int(rows * INCOME_SHARE)), seed, days).to_csv(income_path, index=False)
+    return expenses_path, income_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate seeded ExpenseTracker test data')
+    sub = parser.add_subparsers(dest='command', required=True)
+    db = sub.add_parser('db', help='build a SQLite database')
+    db.add_argument('path')
+    db.add_argument('--users', type=int, default=1000)
+    db.add_argument('--transactions', type=int, default=100_000)
+    csv = sub.add_parser('csv', help='write Expenses.csv and Income.csv')
+    csv.add_argument('directory')
+    csv.add_argument('--rows', type=int, default=100_000, help='expense rows (income is 10%%)')
+    for command in (db, csv):
+        command.add_argument('--seed', type=int, default=42)
+        command.add_argument('--days', type=int, default=DEFAULT_DAYS, help='date span from 2022-01-01')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'db':
+        counts = generate_database(args.path, args.users, args.transactions, args.seed, args.days)
+        print(f"🗄️ {args.path}: {counts['users']:,} users, {counts['expenses']:,} expenses, "
+              f"{counts['income']:,} income rows")
+    else:
+        paths = generate_csvs(args.directory, args.rows, args.seed, args.days)
+        print(f"📄 Wrote {', '.join(paths)}")
+    print(f"   in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
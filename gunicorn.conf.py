@@ -0,0 +1,30 @@
+"""
+Gunicorn settings for ExpenseTracker (used by the Procfile).
+
+    WEB_CONCURRENCY   worker processes (default: 2)
+    GUNICORN_THREADS  threads per worker (default: 4)
+    GUNICORN_TIMEOUT  seconds before a stuck worker is restarted (default: 30)
+    PORT              listen port (default: 5000)
+"""
+
+import os
+
+wsgi_app = 'src.wsgi:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# Import the app (and migrate the schema) once in the master, then fork
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    # Every worker stands for election; exactly one runs the scheduler
+    from src.automation import start_automation
+    from src.leader import start_scheduler_when_leader
+
+    start_scheduler_when_leader(start_automation)
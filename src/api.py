@@ -0,0 +1,217 @@
+"""
+Read-only JSON API over a user's transactions and period summaries.
+
+Lists are returned newest first, one bounded page at a time. Each page
+carries an opaque ``next_cursor`` that encodes the (date, id) of its last
+row; the next page resumes strictly after that key through the
+(user_id, date) and (user_id, category, date) indexes, so every request
+costs O(page size) no matter how deep into a history a client has walked.
+
+    GET /api/expenses?limit=100&start=2025-01-01&end=2025-03-31&category=Food
+    GET /api/income?cursor=...
+    GET /api/summaries?period=week&start=2025-01-01
+"""
+
+import base64
+import binascii
+import json
+import math
+from datetime import date as date_type
+
+from flask import Blueprint, jsonify, request, session
+
+from .database import get_connection
+from .rollups import PERIOD_TYPES
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# endpoint -> (table, category column)
+TRANSACTION_TABLES = {
+    'expenses': ('expenses', 'category'),
+    'income': ('income', 'source'),
+}
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api.errorhandler(APIError)
+def handle_api_error(error):
+    return jsonify({'error': error.message}), error.status
+
+
+def encode_cursor(*key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise APIError('invalid cursor')
+    if not isinstance(key, list) or len(key) != size:
+        raise APIError('invalid cursor')
+    # Elements are bound straight into the keyset comparison
+    for value in key:
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise APIError('invalid cursor')
+        if isinstance(value, float) and not math.isfinite(value):
+            raise APIError('invalid cursor')
+    return key
+
+
+def _page_size():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise APIError('limit must be an integer')
+    if limit < 1:
+        raise APIError('limit must be at least 1')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _date_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return date_type.fromisoformat(value).isoformat()
+    except ValueError:
+        raise APIError(f'{name} must be a YYYY-MM-DD date')
+
+
+def _require_user():
+    if 'user_id' not in session:
+        raise APIError('login required', 401)
+    return session['user_id']
+
+
+def _page(rows, limit, key):
+    """Split limit + 1 fetched rows into (items, next_cursor)"""
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(*key(items[-1])) if has_more else None,
+    }
+
+
+def list_transactions(conn, user_id, kind, limit=DEFAULT_PAGE_SIZE, cursor=None,
+                      start=None, end=None, category=None):
+    """Return one page of a user's expenses or income, newest first"""
+    table, category_col = TRANSACTION_TABLES[kind]
+    where = ['user_id = ?']
+    params = [user_id]
+    if category is not None:
+        where.append(f'{category_col} = ?')
+        params.append(category)
+    if start is not None:
+        where.append('date >= ?')
+        params.append(start)
+    if end is not None:
+        where.append('date <= ?')
+        params.append(end)
+    if cursor is not None:
+        where.append('(date, id) < (?, ?)')
+        params.extend(decode_cursor(cursor, 2))
+
+    sql = (f'SELECT id, amount, {category_col}, description, date FROM {table} '
+           f'WHERE {" AND ".join(where)} ORDER BY date DESC, id DESC LIMIT ?')
+    params.append(limit + 1)
+    columns = ('id', 'amount', category_col, 'description', 'date')
+    rows = [dict(zip(columns, row)) for row in conn.execute(sql, params)]
+    return _page(rows, limit, lambda row: (row['date'], row['id']))
+
+
+def list_summaries(conn, user_id, period_type='month', limit=DEFAULT_PAGE_SIZE, cursor=None,
+                   start=None, end=None, category=None):
+    """Return one page of per-period expense/income totals from the rollups, newest first"""
+    where = ['user_id = ?', 'period_type = ?']
+    params = [user_id, period_type]
+    if category is not None:
+        where.append('category = ?')
+        params.append(category)
+    if start is not None:
+        where.append('period_start >= ?')
+        params.append(start)
+    if end is not None:
+        where.append('period_start <= ?')
+        params.append(end)
+    if cursor is not None:
+        where.append('period_start < ?')
+        params.extend(decode_cursor(cursor, 1))
+
+    sql = f'''
+        SELECT period_start,
+               COALESCE(SUM(CASE WHEN kind = 'expense' THEN total END), 0),
+               COALESCE(SUM(CASE WHEN kind = 'expense' THEN count END), 0),
+               COALESCE(SUM(CASE WHEN kind = 'income' THEN total END), 0),
+               COALESCE(SUM(CASE WHEN kind = 'income' THEN count END), 0)
+        FROM rollups
+        WHERE {" AND ".join(where)}
+        GROUP BY period_start
+        ORDER BY period_start DESC
+        LIMIT ?
+    '''
+    params.append(limit + 1)
+    rows = [
+        {
+            'period_start': period_start,
+            'expenses': expenses,
+            'expense_count': expense_count,
+            'income': income,
+            'income_count': income_count,
+            'savings': income - expenses,
+        }
+        for period_start, expenses, expense_count, income, income_count in conn.execute(sql, params)
+    ]
+    return _page(rows, limit, lambda row: (row['period_start'],))
+
+
+@api.route('/expenses')
+def expenses():
+    return _transactions_response('expenses')
+
+
+@api.route('/income')
+def income():
+    return _transactions_response('income')
+
+
+def _transactions_response(kind):
+    user_id = _require_user()
+    with get_connection() as conn:
+        page = list_transactions(
+            conn, user_id, kind,
+            limit=_page_size(),
+            cursor=request.args.get('cursor'),
+            start=_date_arg('start'),
+            end=_date_arg('end'),
+            category=request.args.get('category'),
+        )
+    return jsonify(page)
+
+
+@api.route('/summaries')
+def summaries():
+    user_id = _require_user()
+    period_type = request.args.get('period', 'month')
+    if period_type not in PERIOD_TYPES:
+        raise APIError(f"period must be one of: {', '.join(PERIOD_TYPES)}")
+    with get_connection() as conn:
+        page = list_summaries(
+            conn, user_id, period_type,
+            limit=_page_size(),
+            cursor=request.args.get('cursor'),
+            start=_date_arg('start'),
+            end=_date_arg('end'),
+            category=request.args.get('category'),
+        )
+    return jsonify(page)
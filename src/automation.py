@@ -1,48 +1,72 @@
-import sqlite3
-import pandas as pd
-import schedule
+import calendar
 import time
-import threading
 from datetime import datetime, timedelta
-from .email_service import send_email_alert
+from .email_service import email_enabled, print_disabled_alert, send_email_alerts
+from .outbox import alert_period, drain_outbox, enqueue_alerts, enqueue_messages
+from .database import get_connection
+from .metrics import track_alert_run
+from .rollups import get_period_summary
+from .scheduler import Every, Job, Monthly, Scheduler, Weekly
+from .sharding import ShardedAlertRun, alert_shards
+from .summary_engine import iter_user_summaries
 
 def get_user_data(user_id):
     """Get user's financial data from database"""
-    conn = sqlite3.connect('expensetracker.db')
+    # pandas is only needed on this legacy path; keep it off the startup import chain
+    import pandas as pd
     
-    # Get user info
-    cursor = conn.cursor()
-    cursor.execute('SELECT email, name, budget FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    
-    if not user:
-        conn.close()
-        return None, None, None
-    
-    user_info = {
-        'email': user[0],
-        'name': user[1],
-        'budget': user[2]
-    }
-    
-    # Get expenses
-    expenses_df = pd.read_sql_query(
-        'SELECT amount, category, description, date FROM expenses WHERE user_id = ? ORDER BY date DESC',
-        conn, params=(user_id,)
-    )
-    
-    # Get income
-    income_df = pd.read_sql_query(
-        'SELECT amount, source, description, date FROM income WHERE user_id = ? ORDER BY date DESC',
-        conn, params=(user_id,)
-    )
-    
-    conn.close()
+    with get_connection() as conn:
+        # Get user info
+        cursor = conn.cursor()
+        cursor.execute('SELECT email, name, budget FROM users WHERE id = ?', (user_id,))
+        user = cursor.fetchone()
+        
+        if not user:
+            return None, None, None
+        
+        user_info = {
+            'email': user[0],
+            'name': user[1],
+            'budget': user[2]
+        }
+        
+        # Get expenses
+        expenses_df = pd.read_sql_query(
+            'SELECT amount, category, description, date FROM expenses WHERE user_id = ? ORDER BY date DESC',
+            conn, params=(user_id,)
+        )
+        
+        # Get income
+        income_df = pd.read_sql_query(
+            'SELECT amount, source, description, date FROM income WHERE user_id = ? ORDER BY date DESC',
+            conn, params=(user_id,)
+        )
     
     return user_info, expenses_df, income_df
 
+def get_user_summary(user_id):
+    """Get user's info and financial summary from the rollup tables"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT email, name, budget FROM users WHERE id = ?', (user_id,))
+        user = cursor.fetchone()
+        
+        if not user:
+            return None, None
+        
+        user_info = {
+            'email': user[0],
+            'name': user[1],
+            'budget': user[2]
+        }
+        result = get_period_summary(conn, user_id)
+    
+    return user_info, result
+
 def calculate_financial_summary(expenses_df, income_df):
     """Calculate financial summary from dataframes"""
+    import pandas as pd
+    
     total_expenses = expenses_df['amount'].sum() if not expenses_df.empty else 0
     total_income = income_df['amount'].sum() if not income_df.empty else 0
     
@@ -79,36 +103,64 @@ def calculate_financial_summary(expenses_df, income_df):
     
     return result
 
+def drain_pending_emails():
+    """Deliver queued alert emails that are due (new sends and retries)"""
+    for user_id, recipient, outcome, error in drain_outbox():
+        if outcome == 'sent':
+            print(f"✅ Alert sent to {recipient}")
+        elif outcome == 'retrying':
+            print(f"⏳ Alert to {recipient} failed, will retry: {error}")
+        else:
+            print(f"❌ Giving up on alert to {recipient}: {error}")
+
+def deliver_alerts(alert_type, label, now=None):
+    """Compute every user's summary and deliver the given alert type
+
+    ``now`` is the moment the alert was due (default: now); a late run still
+    summarizes, and is de-duplicated for, the period it was scheduled for.
+    With ALERT_SHARDS > 1 summaries and rendering run in worker processes.
+    """
+    if alert_shards() > 1:
+        deliver_sharded_alerts(alert_type, label, now)
+        return
+    
+    with track_alert_run(alert_type) as run:
+        summaries = run.count(iter_user_summaries(now=now))
+        
+        if not email_enabled():
+            for user_info, error in send_email_alerts(summaries, alert_type=alert_type):
+                if error:
+                    print(f"Error sending {label} to user {user_info['id']}: {error}")
+            return
+        
+        # Queue first (one entry per user and period, so reruns never double-send),
+        # then drain with rate limiting and retry backoff
+        queued, skipped = enqueue_alerts(summaries, alert_type, period=alert_period(alert_type, now))
+        print(f"📬 Queued {queued} {label}s ({skipped} already queued for this period)")
+        drain_pending_emails()
+
+def deliver_sharded_alerts(alert_type, label, now=None, shards=None):
+    """Render alerts across worker processes and deliver them from this one"""
+    run = ShardedAlertRun(alert_type, now=now, shards=shards)
+    
+    with track_alert_run(alert_type) as tally:
+        if not email_enabled():
+            for user_info, result, msg, status in tally.count(run):
+                print_disabled_alert(user_info, status, result['total_expenses'], user_info['budget'], alert_type)
+            return run.reports
+        
+        messages = ((user_info['id'], msg) for user_info, result, msg, status in tally.count(run))
+        queued, skipped = enqueue_messages(messages, alert_type, period=alert_period(alert_type, now))
+        print(f"📬 Queued {queued} {label}s ({skipped} already queued for this period)")
+        drain_pending_emails()
+        return run.reports
+
 def send_weekly_alerts():
     """Send weekly alerts to all users"""
     print(f"🔔 Running weekly alerts at {datetime.now()}")
     
     try:
-        conn = sqlite3.connect('expensetracker.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM users')
-        user_ids = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
-        for user_id in user_ids:
-            try:
-                user_info, expenses_df, income_df = get_user_data(user_id)
-                if user_info:
-                    result = calculate_financial_summary(expenses_df, income_df)
-                    
-                    # Send email alert
-                    send_email_alert(
-                        user_info, 
-                        result, 
-                        result['total_expenses'], 
-                        user_info['budget'],
-                        alert_type="Weekly Summary"
-                    )
-                    print(f"✅ Weekly alert sent to {user_info['email']}")
-                    
-            except Exception as e:
-                print(f"Error sending weekly alert to user {user_id}: {e}")
-                
+        deliver_alerts("Weekly Summary", "weekly alert")
     except Exception as e:
         print(f"Error in weekly alerts: {e}")
 
@@ -117,52 +169,30 @@ def send_monthly_reports():
     print(f"📊 Running monthly reports at {datetime.now()}")
     
     try:
-        conn = sqlite3.connect('expensetracker.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM users')
-        user_ids = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        
-        for user_id in user_ids:
-            try:
-                user_info, expenses_df, income_df = get_user_data(user_id)
-                if user_info:
-                    result = calculate_financial_summary(expenses_df, income_df)
-                    
-                    # Send email alert
-                    send_email_alert(
-                        user_info, 
-                        result, 
-                        result['total_expenses'], 
-                        user_info['budget'],
-                        alert_type="Monthly Report"
-                    )
-                    print(f"✅ Monthly report sent to {user_info['email']}")
-                    
-            except Exception as e:
-                print(f"Error sending monthly report to user {user_id}: {e}")
-                
+        deliver_alerts("Monthly Report", "monthly report")
     except Exception as e:
         print(f"Error in monthly reports: {e}")
 
+def automation_jobs():
+    """The recurring jobs run by the scheduler"""
+    return [
+        # Weekly alerts: every Sunday at 8 PM (up to 4 missed weeks are caught up)
+        Job('weekly_alerts', Weekly(calendar.SUNDAY, "20:00"),
+            lambda due: deliver_alerts("Weekly Summary", "weekly alert", now=due), catch_up=4),
+        # Monthly reports: 1st of each month at 9 AM
+        Job('monthly_reports', Monthly(1, "09:00"),
+            lambda due: deliver_alerts("Monthly Report", "monthly report", now=due), catch_up=2),
+        # Retry queued emails that failed or were rate limited
+        Job('drain_outbox', Every(minutes=5),
+            lambda due: drain_pending_emails() if email_enabled() else None),
+    ]
+
 def start_automation():
     """Start the automated alert system"""
     print("🚀 Starting ExpenseTracker automation system...")
     
-    # Schedule weekly alerts (every Sunday at 8 PM)
-    schedule.every().sunday.at("20:00").do(send_weekly_alerts)
-    
-    # Schedule monthly reports (1st of each month at 9 AM)
-    schedule.every().day.at("09:00").do(lambda: send_monthly_reports() if datetime.now().day == 1 else None)
-    
-    def run_scheduler():
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-    
-    # Start scheduler in background thread
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
+    # Sleeps until the next job is due; job state survives restarts
+    scheduler_thread = Scheduler(automation_jobs()).start()
     
     print("✅ Automation system started!")
     print("📧 Weekly alerts: Every Sunday at 8:00 PM")
@@ -171,8 +201,10 @@ def start_automation():
     return scheduler_thread
 
 if __name__ == "__main__":
-    # Start the automation system
-    start_automation()
+    from .leader import start_scheduler_when_leader
+    
+    # Dedicated scheduler process: runs the jobs unless another process holds the lock
+    start_scheduler_when_leader(start_automation, mode='elect')
     
     # Keep the script running
     try:
@@ -0,0 +1,120 @@
+"""
+Real-time budget breach alerts.
+
+``record_transaction`` keeps a running ``monthly_spend`` total per user and
+month. Right after an expense insert, and inside the same transaction,
+``check_budget_breach`` reads that row and the user's monthly budget (one
+primary-key lookup). When this month's spend reaches
+BUDGET_ALERT_THRESHOLD x budget, it claims the month's alert by setting
+``alerted_at`` and queues the email in the outbox under the
+(user, "Budget Alert", month) idempotency key. The claim and the outbox row
+commit with the expense, so each user gets at most one budget alert per
+month, however many requests or workers race past the threshold.
+
+Only expenses dated in the current month can trigger an alert; back-dated
+entries just update their month's total.
+
+Configuration (environment variables):
+    BUDGET_ALERT_THRESHOLD  fraction of the budget that triggers the alert,
+                            e.g. 0.8 warns at 80% (default: 1.0)
+"""
+
+import os
+import threading
+from datetime import datetime
+
+from .email_service import email_enabled, print_disabled_alert
+from .email_templates import get_renderer
+from .outbox import drain_outbox, enqueue, idempotency_key
+from .rollups import period_starts
+
+ALERT_TYPE = 'Budget Alert'
+DEFAULT_THRESHOLD = 1.0
+
+
+class BudgetBreach:
+    """This month's spend for a user who just crossed the alert threshold"""
+
+    def __init__(self, user_id, month, spent, budget):
+        self.user_id = user_id
+        self.month = month  # YYYY-MM, the outbox period
+        self.spent = spent
+        self.budget = budget
+
+    @property
+    def outbox_key(self):
+        return idempotency_key(self.user_id, ALERT_TYPE, self.month)
+
+    @property
+    def percent_used(self):
+        return self.spent / self.budget * 100
+
+
+def budget_threshold():
+    return float(os.environ.get('BUDGET_ALERT_THRESHOLD', DEFAULT_THRESHOLD))
+
+
+def check_budget_breach(conn, user_id, date, now=None, threshold=None):
+    """Claim and queue this month's budget alert if the expense just crossed the threshold.
+
+    Call on the same connection and transaction as the expense INSERT, after
+    ``record_transaction``. Returns a BudgetBreach when an alert was queued,
+    otherwise None.
+    """
+    month_start = period_starts(date)['month']
+    now = now or datetime.now()
+    if month_start != period_starts(now)['month']:
+        return None
+
+    row = conn.execute('''
+        SELECT s.total, u.budget, u.email, u.name FROM monthly_spend s
+        JOIN users u ON u.id = s.user_id
+        WHERE s.user_id = ? AND s.month_start = ? AND s.alerted_at IS NULL
+    ''', (user_id, month_start)).fetchone()
+    if row is None:
+        return None
+    spent, budget, email, name = row
+    threshold = budget_threshold() if threshold is None else threshold
+    if not budget or budget <= 0 or spent < budget * threshold:
+        return None
+
+    # The expense INSERT already holds the write lock, so this claim cannot race
+    claimed = conn.execute('''
+        UPDATE monthly_spend SET alerted_at = ?
+        WHERE user_id = ? AND month_start = ? AND alerted_at IS NULL
+    ''', (now.isoformat(sep=' ', timespec='seconds'), user_id, month_start)).rowcount == 1
+    if not claimed:
+        return None
+
+    breach = BudgetBreach(user_id, month_start[:7], spent, budget)
+    user_info = {'id': user_id, 'email': email, 'name': name, 'budget': budget}
+    # Only this month's spend: the template skips rows whose figures are not given
+    msg, status = get_renderer().build_message(
+        user_info, {'monthly_expenses': spent}, spent, budget, ALERT_TYPE
+    )
+    if email_enabled():
+        enqueue(conn, user_id, ALERT_TYPE, breach.month, msg, now)
+    else:
+        print_disabled_alert(user_info, status, spent, budget, ALERT_TYPE)
+    return breach
+
+
+def drain_soon(breaches):
+    """Deliver the alerts just queued for ``breaches`` in a background thread
+
+    Only those outbox entries are sent; everything else waits for the
+    scheduled drain. The thread queues behind any drain already running.
+    """
+    keys = [breach.outbox_key for breach in breaches]
+    if not email_enabled() or not keys:
+        return
+
+    def drain():
+        try:
+            for user_id, recipient, outcome, error in drain_outbox(keys=keys):
+                if error:
+                    print(f"⏳ Alert to {recipient} not delivered ({outcome}): {error}")
+        except Exception as e:
+            print(f"Error delivering queued alerts: {e}")
+
+    threading.Thread(target=drain, name='outbox-drain', daemon=True).start()
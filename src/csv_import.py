@@ -0,0 +1,235 @@
+"""
+Bulk import of Expenses.csv / Income.csv files into the multi-user database.
+
+Rows are parsed as a stream with the csv module, validated, and written
+with batched ``executemany`` inserts. Each batch is one transaction that
+also folds the batch's totals into the rollup tables. Invalid rows are
+skipped and reported; they never abort the import.
+
+    python -m src.csv_import --user USER_ID --kind expenses data/Expenses.csv
+"""
+
+import argparse
+import csv
+import io
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from .budget_alerts import check_budget_breach
+from .dashboard_cache import bump_data_version
+from .database import configure, get_connection
+from .rollups import period_starts
+
+DEFAULT_BATCH_SIZE = 50_000
+MAX_REPORTED_ERRORS = 100
+
+# kind -> (table, category column, CSV category column, CSV description column)
+IMPORT_SCHEMAS = {
+    'expenses': ('expenses', 'category', 'Category', 'Description'),
+    'income': ('income', 'source', 'Source', 'Notes'),
+}
+
+ROLLUP_KINDS = {'expenses': 'expense', 'income': 'income'}
+
+DATE_FORMATS = ('%m/%d/%Y', '%Y-%m-%d')
+
+
+class ImportResult:
+    """Counts and row errors collected during an import"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []  # (line number, message), capped at MAX_REPORTED_ERRORS
+        self.budget_breaches = []  # BudgetBreach for each budget alert the import queued
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def _parse_date(value):
+    value = value.strip()
+    # Fast path for the m/d/Y layout of the exported files; anything else,
+    # two-digit years included, goes through the strict formats below
+    parts = value.split('/')
+    if len(parts) == 3 and len(parts[2]) == 4 and parts[2].isdigit():
+        month, day, year = parts
+        return datetime(int(year), int(month), int(day)).date().isoformat()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date '{value}'")
+
+
+def _iter_valid_rows(reader, kind, result):
+    """Yield (amount, category, description, date) for each valid CSV row"""
+    _, _, category_col, description_col = IMPORT_SCHEMAS[kind]
+    header = [name.strip() for name in next(reader, [])]
+    missing = {'Date', 'Amount', category_col} - set(header)
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+
+    date_idx = header.index('Date')
+    amount_idx = header.index('Amount')
+    category_idx = header.index(category_col)
+    description_idx = header.index(description_col) if description_col in header else None
+    width = max(i for i in (date_idx, amount_idx, category_idx, description_idx) if i is not None) + 1
+
+    parsed_dates = {}  # exported files repeat the same few dates many times
+    for line, row in enumerate(reader, start=2):
+        if len(row) < width:
+            if row:
+                result.add_error(line, 'missing columns')
+            continue
+        try:
+            amount = float(row[amount_idx])
+            raw_date = row[date_idx]
+            date = parsed_dates.get(raw_date)
+            if date is None:
+                date = parsed_dates[raw_date] = _parse_date(raw_date)
+        except ValueError as e:
+            result.add_error(line, str(e))
+            continue
+        if not math.isfinite(amount):
+            result.add_error(line, 'amount is not a finite number')
+            continue
+        if amount < 0:
+            result.add_error(line, 'negative amount')
+            continue
+        category = row[category_idx].strip()
+        if not category:
+            result.add_error(line, f'missing {category_col}')
+            continue
+        description = row[description_idx].strip() if description_idx is not None else ''
+        yield amount, category, description, date
+
+
+def _write_batch(conn, user_id, kind, batch):
+    """Insert one batch and fold it into the rollups; returns any budget breaches it caused"""
+    table, category_col, _, _ = IMPORT_SCHEMAS[kind]
+    rollup_kind = ROLLUP_KINDS[kind]
+    cursor = conn.cursor()
+    cursor.executemany(
+        f'INSERT INTO {table} (user_id, amount, {category_col}, description, date) VALUES (?, ?, ?, ?, ?)',
+        [(user_id, amount, category, description, date) for amount, category, description, date in batch]
+    )
+
+    # Fold the batch into the rollups with one upsert per (period, category)
+    deltas = defaultdict(lambda: [0.0, 0])
+    starts_by_date = {}
+    for amount, category, _, date in batch:
+        starts = starts_by_date.get(date)
+        if starts is None:
+            starts = starts_by_date[date] = period_starts(date)
+        for period_type, period_start in starts.items():
+            delta = deltas[(period_type, period_start, category)]
+            delta[0] += amount
+            delta[1] += 1
+
+    cursor.executemany('''
+        INSERT INTO rollups (user_id, kind, period_type, period_start, category, total, count)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, period_type, period_start, kind, category)
+        DO UPDATE SET total = total + excluded.total, count = count + excluded.count
+    ''', [
+        (user_id, rollup_kind, period_type, period_start, category, total, count)
+        for (period_type, period_start, category), (total, count) in deltas.items()
+    ])
+    bump_data_version(cursor, user_id)
+    if rollup_kind != 'expense':
+        return []
+
+    monthly = defaultdict(float)
+    for (period_type, period_start, _), (total, _) in deltas.items():
+        if period_type == 'month':
+            monthly[period_start] += total
+    cursor.executemany('''
+        INSERT INTO monthly_spend (user_id, month_start, total) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, month_start) DO UPDATE SET total = total + excluded.total
+    ''', [(user_id, month_start, total) for month_start, total in monthly.items()])
+    breaches = (check_budget_breach(conn, user_id, month_start) for month_start in monthly)
+    return [breach for breach in breaches if breach]
+
+
+def import_csv(fileobj, user_id, kind, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Import a text-mode CSV stream for one user; returns an ImportResult.
+
+    ``progress`` is called with the ImportResult after every committed batch.
+    """
+    if kind not in IMPORT_SCHEMAS:
+        raise ValueError(f"Unknown import kind '{kind}'")
+
+    result = ImportResult(kind)
+    start = time.perf_counter()
+    reader = csv.reader(fileobj)
+    batch = []
+
+    def flush():
+        with get_connection() as conn:
+            result.budget_breaches.extend(_write_batch(conn, user_id, kind, batch))
+        result.imported += len(batch)
+        result.elapsed = time.perf_counter() - start
+        batch.clear()
+        if progress:
+            progress(result)
+
+    for row in _iter_valid_rows(reader, kind, result):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def import_uploaded_file(file_storage, user_id, kind, progress=None):
+    """Import a werkzeug FileStorage upload without buffering it in memory"""
+    stream = io.TextIOWrapper(file_storage.stream, encoding='utf-8-sig', newline='')
+    try:
+        return import_csv(stream, user_id, kind, progress=progress)
+    finally:
+        stream.detach()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk import an Expenses/Income CSV for a user')
+    parser.add_argument('path')
+    parser.add_argument('--user', type=int, required=True, help='user id to import into')
+    parser.add_argument('--kind', choices=sorted(IMPORT_SCHEMAS), required=True)
+    parser.add_argument('--db', help='database path (default: $DATABASE_PATH)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        configure(path=args.db)
+
+    def report(result):
+        print(f"📥 {result.imported:,} rows imported ({result.rows_per_second:,.0f} rows/sec)")
+
+    with open(args.path, newline='', encoding='utf-8-sig') as f:
+        result = import_csv(f, args.user, args.kind, batch_size=args.batch_size, progress=report)
+
+    print(f"✅ Imported {result.imported:,} {args.kind} rows in {result.elapsed:.2f}s, "
+          f"skipped {result.skipped:,}")
+    for breach in result.budget_breaches:
+        print(f"⚠️ Budget alert queued: ${breach.spent:.2f} of ${breach.budget:.2f} spent in {breach.month}")
+    for line, message in result.errors:
+        print(f"   line {line}: {message}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Per-user cache of dashboard data.
+
+Every write that changes what a user's dashboard shows bumps
+``users.data_version`` in the same transaction. A dashboard view reads that
+counter (one primary-key lookup) and reuses the cached data when the
+version matches. The counter lives in the database, so a write handled by
+one worker process invalidates the cached copies in every other worker.
+The same version is used as the dashboard's ETag.
+
+Set DASHBOARD_CACHE_SIZE to change how many users are kept (default 1024).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from .metrics import register_collector
+
+DEFAULT_CACHE_SIZE = 1024
+
+DATA_VERSION_COLUMN_SQL = 'ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0'
+
+
+def bump_data_version(cursor, user_id):
+    """Mark the user's dashboard data as changed (call inside the write transaction)"""
+    cursor.execute('UPDATE users SET data_version = data_version + 1 WHERE id = ?', (user_id,))
+
+
+def get_data_version(conn, user_id):
+    """Return the user's current data version, or None if the user does not exist"""
+    row = conn.execute('SELECT data_version FROM users WHERE id = ?', (user_id,)).fetchone()
+    return row[0] if row else None
+
+
+def dashboard_etag(user_id, version):
+    return f'dashboard-{user_id}-{version}'
+
+
+class DashboardCache:
+    """Bounded LRU map of user_id -> (data version, dashboard data)"""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, user_id, version):
+        """Return cached data for this exact version, or None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, version, data):
+        with self._lock:
+            self._entries[user_id] = (version, data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def invalidate(self, user_id=None):
+        """Drop one user's entry, or every entry"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'not_modified': self.not_modified,
+                'evictions': self.evictions,
+            }
+
+
+dashboard_cache = DashboardCache(int(os.environ.get('DASHBOARD_CACHE_SIZE', DEFAULT_CACHE_SIZE)))
+
+
+@register_collector
+def _cache_metrics():
+    stats = dashboard_cache.stats()
+    return [
+        ('expensetracker_dashboard_cache_entries', 'gauge', 'Users with cached dashboard data', stats['size']),
+        ('expensetracker_dashboard_cache_hits_total', 'counter', 'Dashboard cache hits', stats['hits']),
+        ('expensetracker_dashboard_cache_misses_total', 'counter', 'Dashboard cache misses', stats['misses']),
+        ('expensetracker_dashboard_not_modified_total', 'counter', 'Dashboard 304 responses', stats['not_modified']),
+        ('expensetracker_dashboard_cache_evictions_total', 'counter', 'Dashboard cache evictions', stats['evictions']),
+    ]
@@ -0,0 +1,58 @@
+"""
+Dashboard data layer.
+
+Totals come from the monthly rollups and recent transactions from LIMIT
+queries on the (user_id, date) indexes, so the cost of a dashboard view no
+longer grows with the size of the user's history.
+"""
+
+from .rollups import get_totals
+
+RECENT_LIMIT = 10
+
+
+def _fetch_dicts(cursor, sql, params):
+    """Run a query and return its rows as column-name dicts"""
+    cursor.execute(sql, params)
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def get_recent_expenses(conn, user_id, limit=RECENT_LIMIT):
+    """Return the user's most recent expenses, newest first"""
+    return _fetch_dicts(
+        conn.cursor(),
+        'SELECT amount, category, description, date FROM expenses WHERE user_id = ? ORDER BY date DESC LIMIT ?',
+        (user_id, limit)
+    )
+
+
+def get_recent_income(conn, user_id, limit=RECENT_LIMIT):
+    """Return the user's most recent income entries, newest first"""
+    return _fetch_dicts(
+        conn.cursor(),
+        'SELECT amount, source, description, date FROM income WHERE user_id = ? ORDER BY date DESC LIMIT ?',
+        (user_id, limit)
+    )
+
+
+def get_budget(conn, user_id):
+    """Return the user's budget, or 0.0 if the user does not exist"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT budget FROM users WHERE id = ?', (user_id,))
+    result = cursor.fetchone()
+    return result[0] if result else 0.0
+
+
+def get_dashboard_data(conn, user_id, limit=RECENT_LIMIT):
+    """Return the template context for the dashboard page"""
+    total_expenses, total_income = get_totals(conn, user_id)
+
+    return {
+        'total_expenses': total_expenses,
+        'total_income': total_income,
+        'savings': total_income - total_expenses,
+        'budget': get_budget(conn, user_id),
+        'recent_expenses': get_recent_expenses(conn, user_id, limit),
+        'recent_income': get_recent_income(conn, user_id, limit),
+    }
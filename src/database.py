@@ -0,0 +1,171 @@
+"""
+Shared SQLite connection layer for the web app and the automation thread.
+
+Connections are pooled (bounded), opened in WAL mode with a busy timeout so
+readers never block the writer and concurrent writers wait instead of
+failing with "database is locked". Use ``get_connection()`` as a context
+manager; it commits on success and rolls back on any exception.
+
+Configuration (environment variables or ``configure()``):
+    DATABASE_PATH       SQLite file path (default: expensetracker.db)
+    DATABASE_POOL_SIZE  maximum open connections per process (default: 8)
+    DATABASE_BUSY_TIMEOUT_MS  how long a writer waits for the lock (default: 5000)
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .metrics import TimedConnection
+
+DEFAULT_PATH = 'expensetracker.db'
+DEFAULT_POOL_SIZE = 8
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',  # ~16 MB page cache per connection
+    'PRAGMA temp_store = MEMORY',
+)
+
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections shared between threads"""
+
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS):
+        self.path = path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._pid = os.getpid()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            factory=TimedConnection,  # statement counts and timings for /metrics
+        )
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _check_fork(self):
+        # Connections must never be shared across a fork (e.g. gunicorn preload).
+        # Forget any inherited ones without touching them; the parent should
+        # have called close_all() before forking (see wsgi.py)
+        if self._pid != os.getpid():
+            with self._lock:
+                self._idle = queue.LifoQueue()
+                self._created = 0
+                self._pid = os.getpid()
+
+    def acquire(self, timeout=None):
+        """Return an idle connection, opening one if the pool is not full"""
+        self._check_fork()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available within {timeout}s")
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        if self._pid != os.getpid():
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def discard(self, conn):
+        """Close a broken connection and free its slot"""
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_database_path():
+    """Return the configured database path"""
+    return os.environ.get('DATABASE_PATH', DEFAULT_PATH)
+
+
+def configure(path=None, pool_size=None, busy_timeout_ms=None):
+    """(Re)create the process-wide pool, e.g. to point at another database"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(
+            path or get_database_path(),
+            size=pool_size or int(os.environ.get('DATABASE_POOL_SIZE', DEFAULT_POOL_SIZE)),
+            busy_timeout_ms=busy_timeout_ms or int(
+                os.environ.get('DATABASE_BUSY_TIMEOUT_MS', DEFAULT_BUSY_TIMEOUT_MS)
+            ),
+        )
+    return _pool
+
+
+def get_pool():
+    """Return the process-wide pool, creating it from the environment if needed"""
+    if _pool is None:
+        configure()
+    return _pool
+
+
+@contextmanager
+def get_connection(timeout=30):
+    """Borrow a pooled connection; commit on success, roll back on error"""
+    pool = get_pool()
+    conn = pool.acquire(timeout=timeout)
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pool.discard(conn)
+            raise
+        pool.release(conn)
+        raise
+    pool.release(conn)
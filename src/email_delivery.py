@@ -0,0 +1,246 @@
+"""
+SMTP delivery engine for ExpenseTracker.
+
+Keeps a small pool of long-lived, authenticated SMTP sessions and sends
+messages concurrently from a bounded worker pool, instead of connecting,
+running STARTTLS and logging in again for every single email.
+
+Configuration (environment variables):
+    SMTP_SERVER                   default: smtp.gmail.com
+    SMTP_PORT                     default: 587
+    SMTP_USE_TLS                  STARTTLS after connecting (default: true)
+    SENDER_EMAIL / SENDER_PASSWORD  login credentials (login is skipped if no password)
+    SMTP_POOL_SIZE                concurrent sessions and workers (default: 4)
+    SMTP_MAX_MESSAGES_PER_CONNECTION  recycle a session after this many (default: 100)
+    SMTP_TIMEOUT                  socket timeout in seconds (default: 30)
+    SMTP_IDLE_TIMEOUT             close pooled sessions idle longer than this (default: 60)
+
+Servers drop idle connections on their own schedule, so a session idle for
+more than NOOP_AFTER_SECONDS is checked with NOOP before it is reused, and
+one that answers 421 (service closing) is discarded rather than pooled.
+
+For local testing point it at a stand-in server without TLS, e.g.
+``python -m aiosmtpd -n -l localhost:8025`` with SMTP_SERVER=localhost,
+SMTP_PORT=8025 and SMTP_USE_TLS=false.
+"""
+
+import os
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import EMAIL_SEND_SECONDS, EMAILS, log_event
+
+NOOP_AFTER_SECONDS = 5
+SERVICE_CLOSING = 421
+
+
+class SMTPSettings:
+    """SMTP connection settings, read from the environment by default"""
+
+    def __init__(self, server=None, port=None, username=None, password=None, use_tls=None,
+                 pool_size=None, max_messages_per_connection=None, timeout=None, idle_timeout=None):
+        env = os.environ
+        self.server = server or env.get('SMTP_SERVER', 'smtp.gmail.com')
+        self.port = int(port or env.get('SMTP_PORT', 587))
+        self.username = username if username is not None else env.get('SENDER_EMAIL', 'your_email@gmail.com')
+        self.password = password if password is not None else env.get('SENDER_PASSWORD', 'your_app_password')
+        if use_tls is None:
+            use_tls = env.get('SMTP_USE_TLS', 'true').lower() == 'true'
+        self.use_tls = use_tls
+        self.pool_size = int(pool_size or env.get('SMTP_POOL_SIZE', 4))
+        self.max_messages_per_connection = int(
+            max_messages_per_connection or env.get('SMTP_MAX_MESSAGES_PER_CONNECTION', 100)
+        )
+        self.timeout = float(timeout or env.get('SMTP_TIMEOUT', 30))
+        self.idle_timeout = float(idle_timeout or env.get('SMTP_IDLE_TIMEOUT', 60))
+
+
+class _Session:
+    """One open SMTP connection, the number of messages sent on it and when it was last used"""
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def closed(self):
+        # smtplib drops the socket itself after a 421 reply
+        return self.smtp.sock is None
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class SMTPConnectionPool:
+    """A bounded pool of authenticated SMTP sessions"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(settings.pool_size)
+        self.connections_opened = 0
+
+    def _connect(self):
+        s = self.settings
+        smtp = smtplib.SMTP(s.server, s.port, timeout=s.timeout)
+        try:
+            if s.use_tls:
+                smtp.starttls()
+            if s.username and s.password:
+                smtp.login(s.username, s.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connections_opened += 1
+        return _Session(smtp)
+
+    def _usable(self, session):
+        """Whether an idle session can be reused: not expired, and alive if idle for a while"""
+        idle = time.monotonic() - session.last_used
+        if session.closed or idle > self.settings.idle_timeout:
+            return False
+        if idle < NOOP_AFTER_SECONDS:
+            return True
+        try:
+            return session.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self):
+        """Borrow a live session, opening a new one if none is idle"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    session = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._usable(session):
+                    return session
+                session.smtp.close()
+            return self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, session):
+        """Return a session, recycling it once it reaches the message cap"""
+        if session.closed:
+            self._slots.release()
+            return
+        if session.sent >= self.settings.max_messages_per_connection:
+            session.close()
+        else:
+            session.last_used = time.monotonic()
+            self._idle.put(session)
+        self._slots.release()
+
+    def discard(self, session):
+        """Drop a session that failed at the connection level"""
+        session.smtp.close()
+        self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            session.close()
+
+    def send(self, msg, retries=1):
+        """Send one message, reconnecting after connection-level failures"""
+        start = time.perf_counter()
+        try:
+            self._send(msg, retries)
+        except Exception as e:
+            EMAILS.inc('failed')
+            log_event('email_failed', recipient=msg['To'], error=str(e))
+            raise
+        finally:
+            EMAIL_SEND_SECONDS.observe(time.perf_counter() - start)
+        EMAILS.inc('sent')
+
+    def _send(self, msg, retries):
+        for attempt in range(retries + 1):
+            session = self.acquire()
+            try:
+                session.smtp.send_message(msg)
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                if not _closing(e) and not session.closed:
+                    # The server answered; the session itself is still usable
+                    self.release(session)
+                    raise
+                # 421: the server is closing this connection, so retry on a new one
+                self.discard(session)
+                if attempt == retries:
+                    raise
+                continue
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self.discard(session)
+                if attempt == retries:
+                    raise
+                continue
+            session.sent += 1
+            self.release(session)
+            return
+
+
+def _closing(error):
+    """Whether an SMTP error reply says the server is closing the connection"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return any(code == SERVICE_CLOSING for code, _ in error.recipients.values())
+    return error.smtp_code == SERVICE_CLOSING
+
+
+class DeliveryEngine:
+    """Sends messages concurrently over a shared SMTP connection pool"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or SMTPSettings()
+        self.pool = SMTPConnectionPool(self.settings)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings.pool_size, thread_name_prefix='smtp'
+        )
+        # Bound in-flight work so a large run never queues every message at once
+        self._in_flight = threading.BoundedSemaphore(self.settings.pool_size * 4)
+
+    def submit(self, msg):
+        """Queue a message for delivery and return its Future"""
+        self._in_flight.acquire()
+        future = self._executor.submit(self.pool.send, msg)
+        future.add_done_callback(lambda _: self._in_flight.release())
+        return future
+
+    def send(self, msg):
+        """Send a message and wait for the result"""
+        return self.submit(msg).result()
+
+    def send_many(self, messages):
+        """Send messages concurrently; return [(msg, error_or_None)] in order"""
+        futures = [(msg, self.submit(msg)) for msg in messages]
+        return [(msg, future.exception()) for msg, future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close_all()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_delivery_engine():
+    """Return the process-wide delivery engine"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DeliveryEngine()
+        return _engine
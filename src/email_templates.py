@@ -0,0 +1,95 @@
+"""
+Compiled Jinja templates for ExpenseTracker alert emails.
+
+The templates under ``templates/email`` are compiled once per process, and
+the static wrapper/footer fragments are rendered once and reused, so each
+recipient only pays for filling in their own figures.
+"""
+
+import os
+import threading
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+
+def alert_status(total_expenses, budget):
+    """Return (status, status_color) for the email header"""
+    if total_expenses > budget and budget > 0:
+        return "Budget Exceeded ⚠️", "#e74c3c"
+    return "Within Budget ✅", "#27ae60"
+
+
+class AlertEmailRenderer:
+    """Renders alert emails from a compiled template"""
+
+    def __init__(self, template_dir=TEMPLATE_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self.template = self.env.get_template('email/alert.html')
+        # Static fragments, rendered once and injected as safe markup
+        self.page_open = Markup(self.env.get_template('email/_page_open.html').render())
+        self.page_close = Markup(self.env.get_template('email/_page_close.html').render())
+
+    def render_html(self, user_info, result, total_expenses, budget, alert_type="Weekly Summary"):
+        """Return (html, status) for one recipient"""
+        status, status_color = alert_status(total_expenses, budget)
+        html = self.template.render(
+            page_open=self.page_open,
+            page_close=self.page_close,
+            alert_type=alert_type,
+            name=user_info.get('name', 'User'),
+            status=status,
+            status_color=status_color,
+            result=result if isinstance(result, dict) else {},
+            total_expenses=total_expenses,
+            budget=budget,
+        )
+        return html, status
+
+    def build_message(self, user_info, result, total_expenses, budget, alert_type="Weekly Summary",
+                      sender_email=None, subject_date=None):
+        """Return (MIME message, status) for one recipient"""
+        html, status = self.render_html(user_info, result, total_expenses, budget, alert_type)
+        subject_date = subject_date or datetime.now().strftime('%B %d, %Y')
+
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = f"💰 {alert_type} - ExpenseTracker ({subject_date})"
+        msg["From"] = sender_email or os.environ.get('SENDER_EMAIL', 'your_email@gmail.com')
+        msg["To"] = user_info.get('email')
+        msg.attach(MIMEText(html, "html"))
+        return msg, status
+
+    def render_batch(self, summaries, alert_type="Weekly Summary"):
+        """Build MIME messages for a list of (user_info, result) summaries"""
+        sender_email = os.environ.get('SENDER_EMAIL', 'your_email@gmail.com')
+        subject_date = datetime.now().strftime('%B %d, %Y')
+        return [
+            self.build_message(
+                user_info, result, result['total_expenses'], user_info['budget'], alert_type,
+                sender_email=sender_email, subject_date=subject_date
+            )[0]
+            for user_info, result in summaries
+        ]
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    """Return the process-wide renderer, compiling templates on first use"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = AlertEmailRenderer()
+        return _renderer
@@ -0,0 +1,121 @@
+"""
+Single-leader election for the alert scheduler.
+
+Every process that could run the scheduler (each gunicorn worker, the dev
+server, a standalone ``python -m src.automation``) calls
+``start_scheduler_when_leader``. Exactly one of them holds an exclusive lock
+on a file next to the database and runs the jobs; the others keep retrying
+in the background, so if the leader exits (worker recycled, crash) another
+process takes over within ``SCHEDULER_RETRY_SECONDS``. The OS drops the lock
+when its holder dies, so a stale lock can never block the scheduler.
+
+Configuration:
+    SCHEDULER_MODE          'elect' (default) or 'off' to never run it here
+    SCHEDULER_LOCK_PATH     lock file (default: <DATABASE_PATH>.scheduler.lock)
+    SCHEDULER_RETRY_SECONDS how often standbys retry the lock (default: 30)
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .database import get_database_path
+
+DEFAULT_RETRY_SECONDS = 30
+
+# The lock this process won; closing its file would release the lock
+_held_lock = None
+
+
+def scheduler_mode():
+    return os.environ.get('SCHEDULER_MODE', 'elect').strip().lower()
+
+
+def default_lock_path():
+    return os.environ.get('SCHEDULER_LOCK_PATH') or f'{get_database_path()}.scheduler.lock'
+
+
+class LeaderLock:
+    """A non-blocking exclusive file lock held for the life of the process"""
+
+    def __init__(self, path=None):
+        self.path = path or default_lock_path()
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        """Take the lock if nobody holds it; returns True when this process is the leader"""
+        if self._file is not None:
+            return True
+        f = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+
+        # Record the holder for operators; the lock itself is what counts
+        f.seek(0)
+        f.truncate()
+        f.write(f'{os.getpid()}\n')
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def start_scheduler_when_leader(start, lock=None, retry_seconds=None, mode=None):
+    """Run ``start()`` once this process wins the leader lock.
+
+    Returns the background election thread, or None when the mode (default:
+    SCHEDULER_MODE) is 'off'. ``start`` must not block (start_automation
+    returns after launching its own thread).
+    """
+    if (mode or scheduler_mode()) == 'off':
+        print("⏸️ Scheduler disabled in this process (SCHEDULER_MODE=off)")
+        return None
+
+    lock = lock or LeaderLock()
+    if retry_seconds is None:
+        retry_seconds = float(os.environ.get('SCHEDULER_RETRY_SECONDS', DEFAULT_RETRY_SECONDS))
+
+    def elect():
+        global _held_lock
+        announced = False
+        while True:
+            if lock.try_acquire():
+                _held_lock = lock
+                print(f"👑 Process {os.getpid()} is the scheduler leader")
+                start()
+                return
+            if not announced:
+                print(f"⏳ Process {os.getpid()} is a scheduler standby")
+                announced = True
+            time.sleep(retry_seconds)
+
+    thread = threading.Thread(target=elect, name='scheduler-election', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,350 @@
+"""
+In-process metrics for ExpenseTracker, exposed in Prometheus text format.
+
+Counters and histograms live in memory and cost a dict lookup and an
+increment under a lock per observation, cheap enough to leave on in
+production. The instrumentation covers:
+
+* every Flask request: latency per endpoint, status counts, and the number
+  and total duration of SQL queries the request ran;
+* every SQL statement run on a pooled connection (``TimedConnection``);
+* alert runs (duration, users processed, outcome) and shard timings;
+* SMTP sends (latency, failures) and outbox delivery outcomes.
+
+``init_app`` adds the request hooks and the ``/metrics`` endpoint. Each
+request, alert run and email failure is also written as one JSON line to
+the ``expensetracker`` logger.
+
+Metrics are per process: under gunicorn each worker keeps its own counters
+and a scrape reaches whichever worker accepts it.
+
+Configuration (environment variables):
+    METRICS_TOKEN   if set, /metrics requires ``Authorization: Bearer <token>``
+    METRICS_LOG     structured log lines on stderr: on | off (default: on)
+"""
+
+import bisect
+import hmac
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+RUN_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+class Registry:
+    """Every metric and collector rendered by /metrics"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, kind, help_text, value in collector():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def register_collector(collector):
+    """Add a callable returning (name, kind, help, value) samples computed at scrape time"""
+    REGISTRY.collectors.append(collector)
+    return collector
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.metrics.append(self)
+
+    def _labels(self, labels, extra=()):
+        pairs = list(zip(self.labelnames, labels)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    """A monotonically increasing count; labels are positional, in ``labelnames`` order"""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [f'{self.name}{self._labels(labels)} {_number(value)}'
+                                 for labels, value in values]
+
+
+class Histogram(_Metric):
+    """Bucketed observations with their sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help_text, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (the last slot is +Inf), sum, count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def render(self):
+        with self._lock:
+            values = [(labels, (list(counts), total, count)) for labels, (counts, total, count)
+                      in self._values.items()]
+        lines = self._header()
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{self._labels(labels, [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{self.name}_sum{self._labels(labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{self._labels(labels)} {count}')
+        return lines
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'expensetracker_http_request_duration_seconds', 'Request latency by Flask endpoint',
+    ('endpoint', 'method'))
+HTTP_REQUESTS = Counter(
+    'expensetracker_http_requests_total', 'Requests by Flask endpoint and status',
+    ('endpoint', 'method', 'status'))
+REQUEST_SQL_QUERIES = Histogram(
+    'expensetracker_http_request_sql_queries', 'SQL statements run per request',
+    ('endpoint',), buckets=QUERY_COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram(
+    'expensetracker_http_request_sql_seconds', 'Total SQL time per request', ('endpoint',))
+SQL_QUERY_SECONDS = Histogram(
+    'expensetracker_sql_query_duration_seconds', 'SQL statement latency by verb', ('verb',))
+SQL_ERRORS = Counter(
+    'expensetracker_sql_errors_total', 'SQL statements that raised, by error', ('error',))
+ALERT_RUN_SECONDS = Histogram(
+    'expensetracker_alert_run_duration_seconds', 'Alert run wall-clock time',
+    ('alert_type',), buckets=RUN_BUCKETS)
+ALERT_RUNS = Counter(
+    'expensetracker_alert_runs_total', 'Alert runs by outcome', ('alert_type', 'outcome'))
+ALERT_USERS = Counter(
+    'expensetracker_alert_users_total', 'Users processed by alert runs', ('alert_type',))
+ALERT_SHARD_SECONDS = Histogram(
+    'expensetracker_alert_shard_duration_seconds', 'Per-shard render time in sharded alert runs',
+    buckets=RUN_BUCKETS)
+EMAIL_SEND_SECONDS = Histogram(
+    'expensetracker_email_send_duration_seconds', 'SMTP send latency, including reconnects')
+EMAILS = Counter(
+    'expensetracker_email_sends_total', 'SMTP sends by outcome', ('outcome',))
+OUTBOX_DELIVERIES = Counter(
+    'expensetracker_outbox_deliveries_total', 'Outbox delivery attempts by outcome', ('outcome',))
+
+
+# -- structured logs ------------------------------------------------------
+
+logger = logging.getLogger('expensetracker')
+_log_enabled = os.environ.get('METRICS_LOG', 'on').lower() != 'off'
+if _log_enabled and not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def log_event(event, **fields):
+    """Write one JSON log line: {"ts": ..., "event": ..., **fields}"""
+    if _log_enabled:
+        logger.info(json.dumps({'ts': round(time.time(), 3), 'event': event, **fields}, default=str))
+
+
+# -- SQL timing -------------------------------------------------------------
+
+_request = threading.local()
+_verbs = {}  # statement text -> leading keyword; the app runs a small fixed set
+MAX_CACHED_STATEMENTS = 1000
+
+
+def _verb(sql):
+    verb = _verbs.get(sql)
+    if verb is None:
+        words = sql.split(None, 1)
+        verb = words[0].upper() if words else 'OTHER'
+        if len(_verbs) < MAX_CACHED_STATEMENTS:
+            _verbs[sql] = verb
+    return verb
+
+
+def _record_query(sql, seconds, error=None):
+    SQL_QUERY_SECONDS.observe(seconds, _verb(sql))
+    if error is not None:
+        SQL_ERRORS.inc(str(error)[:60])
+    if getattr(_request, 'active', False):
+        _request.queries += 1
+        _request.sql_seconds += seconds
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            result = super().execute(sql, parameters)
+        except sqlite3.Error as e:
+            _record_query(sql, time.perf_counter() - start, e)
+            raise
+        _record_query(sql, time.perf_counter() - start)
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            result = super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error as e:
+            _record_query(sql, time.perf_counter() - start, e)
+            raise
+        _record_query(sql, time.perf_counter() - start)
+        return result
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection factory whose statements are counted and timed"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # The C implementations of these bypass cursor(), so route them through it
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# -- alert runs -------------------------------------------------------------
+
+class AlertRun:
+    """Mutable tally handed out by ``track_alert_run``"""
+
+    def __init__(self, alert_type):
+        self.alert_type = alert_type
+        self.users = 0
+
+    def count(self, iterable):
+        """Pass items through, counting each one as a processed user"""
+        for item in iterable:
+            self.users += 1
+            yield item
+
+
+@contextmanager
+def track_alert_run(alert_type):
+    """Time an alert run and record its outcome and the users it processed"""
+    run = AlertRun(alert_type)
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield run
+        outcome = 'ok'
+    finally:
+        seconds = time.perf_counter() - start
+        ALERT_RUN_SECONDS.observe(seconds, alert_type)
+        ALERT_RUNS.inc(alert_type, outcome)
+        ALERT_USERS.inc(alert_type, amount=run.users)
+        log_event('alert_run', alert_type=alert_type, outcome=outcome, users=run.users,
+                  duration_ms=round(seconds * 1000, 1))
+
+
+# -- Flask integration ------------------------------------------------------
+
+def _before_request():
+    _request.active = True
+    _request.queries = 0
+    _request.sql_seconds = 0.0
+    _request.start = time.perf_counter()
+
+
+def _after_request(response):
+    from flask import request
+
+    if not getattr(_request, 'active', False):
+        return response
+    _request.active = False
+    seconds = time.perf_counter() - _request.start
+    endpoint = request.endpoint or 'unmatched'
+    HTTP_REQUEST_SECONDS.observe(seconds, endpoint, request.method)
+    HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    REQUEST_SQL_QUERIES.observe(_request.queries, endpoint)
+    REQUEST_SQL_SECONDS.observe(_request.sql_seconds, endpoint)
+    log_event('request', endpoint=endpoint, method=request.method, path=request.path,
+              status=response.status_code, duration_ms=round(seconds * 1000, 2),
+              sql_queries=_request.queries, sql_ms=round(_request.sql_seconds * 1000, 2))
+    return response
+
+
+def _metrics_endpoint():
+    from flask import Response, request
+
+    token = os.environ.get('METRICS_TOKEN')
+    # Compare bytes: compare_digest raises TypeError on non-ASCII str
+    supplied = request.headers.get('Authorization', '').encode()
+    if token and not hmac.compare_digest(supplied, f'Bearer {token}'.encode()):
+        return Response('Unauthorized\n', 401, {'WWW-Authenticate': 'Bearer'})
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+def init_app(app):
+    """Instrument every request of ``app`` and serve /metrics"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', _metrics_endpoint)
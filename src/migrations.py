@@ -0,0 +1,196 @@
+"""
+Versioned schema migrations for the ExpenseTracker database.
+
+Each migration is applied once, in order, inside its own transaction and
+recorded in the ``schema_version`` table. Statements are written to be
+idempotent so re-running against a partially migrated database is safe.
+A step that needs Python (data repair) is a callable taking the connection.
+"""
+
+from datetime import datetime
+
+from .dashboard_cache import DATA_VERSION_COLUMN_SQL
+from .outbox import CREATE_OUTBOX_INDEX_SQL, CREATE_OUTBOX_SQL
+from .rollups import (
+    CREATE_MONTHLY_SPEND_SQL, CREATE_ROLLUPS_SQL, backfill_statements, monthly_spend_backfill_sql,
+    repair_transaction_dates,
+)
+from .scheduler import CREATE_SCHEDULED_JOBS_SQL
+
+# (version, name, statements) - append new migrations, never edit old ones
+MIGRATIONS = [
+    (1, 'create_base_tables', [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            name TEXT NOT NULL,
+            budget REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT,
+            date DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS income (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            amount REAL NOT NULL,
+            source TEXT NOT NULL,
+            description TEXT,
+            date DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+    ]),
+    # Per-user, date-ordered access: totals and date-range sums are answered
+    # from the index alone; recent-transaction lists only touch LIMIT rows.
+    (2, 'index_expenses_user_date', [
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_date '
+        'ON expenses (user_id, date, amount, category)',
+    ]),
+    (3, 'index_income_user_date', [
+        'CREATE INDEX IF NOT EXISTS idx_income_user_date '
+        'ON income (user_id, date, amount, source)',
+    ]),
+    # Daily/weekly/monthly per-category totals, backfilled from existing rows.
+    # Legacy dates SQLite cannot read are normalized first (or reported and skipped)
+    (4, 'create_rollups', [CREATE_ROLLUPS_SQL, repair_transaction_dates]
+        + [sql for sql, _ in backfill_statements()]),
+    # All-users alert runs: range over one period type, grouped by user
+    (5, 'index_rollups_period', [
+        'CREATE INDEX IF NOT EXISTS idx_rollups_period '
+        'ON rollups (period_type, period_start, user_id, kind, total)',
+    ]),
+    (6, 'create_email_outbox', [CREATE_OUTBOX_SQL, CREATE_OUTBOX_INDEX_SQL]),
+    # Dashboard cache invalidation counter (ADD COLUMN has no IF NOT EXISTS;
+    # the schema_version check keeps it from running twice)
+    (7, 'add_users_data_version', [DATA_VERSION_COLUMN_SQL]),
+    # Keyset pagination for the JSON API: the implicit rowid suffix makes
+    # these (user_id, date, id) and (user_id, category, date, id) orderings
+    (8, 'index_transactions_keyset', [
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_keyset ON expenses (user_id, date)',
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_category_keyset ON expenses (user_id, category, date)',
+        'CREATE INDEX IF NOT EXISTS idx_income_user_keyset ON income (user_id, date)',
+        'CREATE INDEX IF NOT EXISTS idx_income_user_source_keyset ON income (user_id, source, date)',
+    ]),
+    (9, 'create_scheduled_jobs', [CREATE_SCHEDULED_JOBS_SQL]),
+    # O(1) per-user monthly spend for the budget check on every expense insert
+    (10, 'create_monthly_spend', [CREATE_MONTHLY_SPEND_SQL, monthly_spend_backfill_sql()[0]]),
+]
+
+# Queries on the request/alert path that must never fall back to a full scan
+HOT_QUERIES = {
+    'dashboard_expenses': 'SELECT amount, category, description, date FROM expenses '
+                          'WHERE user_id = ? ORDER BY date DESC LIMIT ?',
+    'dashboard_income': 'SELECT amount, source, description, date FROM income '
+                        'WHERE user_id = ? ORDER BY date DESC LIMIT ?',
+    'expense_total': 'SELECT SUM(amount) FROM expenses WHERE user_id = ?',
+    'income_total': 'SELECT SUM(amount) FROM income WHERE user_id = ?',
+    'expenses_since': 'SELECT SUM(amount) FROM expenses WHERE user_id = ? AND date >= ?',
+    'rollup_totals': "SELECT kind, SUM(total) FROM rollups WHERE user_id = ? "
+                     "AND period_type = 'month' GROUP BY kind",
+    'user_budget': 'SELECT budget FROM users WHERE id = ?',
+    'user_data_version': 'SELECT data_version FROM users WHERE id = ?',
+    'monthly_spend': 'SELECT s.total, u.budget, u.email, u.name FROM monthly_spend s '
+                     'JOIN users u ON u.id = s.user_id '
+                     'WHERE s.user_id = ? AND s.month_start = ? AND s.alerted_at IS NULL',
+    'user_login': 'SELECT id, password_hash, name FROM users WHERE email = ?',
+    'api_expenses_page': 'SELECT id, amount, category, description, date FROM expenses '
+                         'WHERE user_id = ? AND (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?',
+    'api_expenses_category_page': 'SELECT id, amount, category, description, date FROM expenses '
+                                  'WHERE user_id = ? AND category = ? AND (date, id) < (?, ?) '
+                                  'ORDER BY date DESC, id DESC LIMIT ?',
+    'api_income_page': 'SELECT id, amount, source, description, date FROM income '
+                       'WHERE user_id = ? AND (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?',
+}
+
+
+def ensure_version_table(conn):
+    """Create the schema_version bookkeeping table if needed"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def get_schema_version(conn):
+    """Return the highest applied migration version (0 for a fresh database)"""
+    ensure_version_table(conn)
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, migrations=None):
+    """Apply every pending migration in version order.
+
+    Returns the list of versions that were applied by this call.
+    """
+    migrations = sorted(migrations or MIGRATIONS, key=lambda m: m[0])
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, name, statements in migrations:
+        if version <= current:
+            continue
+
+        conn.execute('BEGIN')
+        try:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(
+                'INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)',
+                (version, name, datetime.now().isoformat(sep=' '))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        print(f"🛠️ Applied migration {version}: {name}")
+        applied.append(version)
+
+    return applied
+
+
+def find_full_scans(conn, queries=None):
+    """Return {query_name: [plan details]} for hot queries that scan a table"""
+    queries = queries or HOT_QUERIES
+    full_scans = {}
+
+    for name, sql in queries.items():
+        params = (None,) * sql.count('?')
+        plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+        details = [row[-1] for row in plan]
+        scans = [d for d in details if d.startswith('SCAN') and 'INDEX' not in d]
+        if scans:
+            full_scans[name] = scans
+
+    return full_scans
+
+
+def check_query_plans(conn, queries=None):
+    """Warn at startup when a known hot query would do a full table scan"""
+    full_scans = find_full_scans(conn, queries)
+    for name, details in full_scans.items():
+        print(f"⚠️ Hot query '{name}' falls back to a full scan: {'; '.join(details)}")
+    return not full_scans
@@ -0,0 +1,306 @@
+"""
+Durable email outbox for ExpenseTracker alerts.
+
+Producers render alert emails and enqueue them in the ``email_outbox``
+table under an idempotency key of (user, alert type, period), so rerunning
+a job - or resuming after a crash halfway through - never mails anyone
+twice. A worker drains due messages through the SMTP delivery engine with
+a global messages-per-second limit and retries failures with exponential
+backoff.
+
+Drains are serialized: within a process by a lock, across processes by an
+exclusive lock on a file next to the database. Only one drain sends at a
+time, through the process's single rate limiter, so the limit holds however
+many workers, scheduler runs and budget alerts ask for a drain.
+
+Configuration (environment variables):
+    EMAIL_RATE_LIMIT          messages per second across all workers (default: 10)
+    EMAIL_MAX_ATTEMPTS        give up after this many tries (default: 5)
+    EMAIL_RETRY_BASE_SECONDS  first retry delay, doubled each attempt (default: 60)
+    OUTBOX_LOCK_PATH          drain lock file (default: <DATABASE_PATH>.outbox.lock)
+"""
+
+import argparse
+import email
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .database import get_connection, get_database_path
+from .email_delivery import get_delivery_engine
+from .email_service import build_alert_message
+from .metrics import OUTBOX_DELIVERIES
+
+CREATE_OUTBOX_SQL = '''
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT UNIQUE NOT NULL,
+        user_id INTEGER,
+        alert_type TEXT NOT NULL,
+        period TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        message TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL,
+        claimed_at TIMESTAMP,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP
+    )
+'''
+
+CREATE_OUTBOX_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS idx_email_outbox_due '
+    'ON email_outbox (status, next_attempt_at)'
+)
+
+MAX_RETRY_DELAY = timedelta(hours=6)
+# A claimed row older than this belongs to a worker that died mid-send
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def _timestamp(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def alert_period(alert_type, now=None):
+    """Return the period an alert covers: ISO week for weekly, month otherwise"""
+    now = now or datetime.now()
+    if 'week' in alert_type.lower():
+        year, week, _ = now.isocalendar()
+        return f"{year}-W{week:02d}"
+    return now.strftime('%Y-%m')
+
+
+def idempotency_key(user_id, alert_type, period):
+    return f"{user_id}:{alert_type}:{period}"
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting sends per second"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_limiters = {}  # rate -> the RateLimiter every drain in this process shares
+_limiters_lock = threading.Lock()
+_drain_thread_lock = threading.Lock()
+
+
+def get_rate_limiter(rate):
+    """Return this process's limiter for ``rate`` messages per second"""
+    with _limiters_lock:
+        limiter = _limiters.get(rate)
+        if limiter is None:
+            limiter = _limiters[rate] = RateLimiter(rate)
+        return limiter
+
+
+def default_lock_path():
+    return os.environ.get('OUTBOX_LOCK_PATH') or f'{get_database_path()}.outbox.lock'
+
+
+@contextmanager
+def drain_lock(path=None):
+    """Block until this thread is the only drainer on the machine"""
+    with _drain_thread_lock:
+        with open(path or default_lock_path(), 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def enqueue(conn, user_id, alert_type, period, msg, now=None):
+    """Queue a rendered message; returns False if this alert was already queued"""
+    now = now or datetime.now()
+    cursor = conn.execute('''
+        INSERT OR IGNORE INTO email_outbox
+            (idempotency_key, user_id, alert_type, period, recipient, message, next_attempt_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        idempotency_key(user_id, alert_type, period), user_id, alert_type, period,
+        msg['To'], msg.as_string(), _timestamp(now)
+    ))
+    return cursor.rowcount == 1
+
+
+def enqueue_messages(messages, alert_type, period=None, batch_size=500):
+    """Queue already-rendered (user_id, msg) pairs.
+
+    Returns (queued, skipped) where skipped counts alerts that already had
+    an outbox entry for this period.
+    """
+    period = period or alert_period(alert_type)
+    queued = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal queued, skipped
+        with get_connection() as conn:
+            for user_id, msg in batch:
+                if enqueue(conn, user_id, alert_type, period, msg):
+                    queued += 1
+                else:
+                    skipped += 1
+        batch.clear()
+
+    for user_id, msg in messages:
+        batch.append((user_id, msg))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return queued, skipped
+
+
+def enqueue_alerts(alerts, alert_type, period=None, batch_size=500):
+    """Render and queue alerts for (user_info, result) pairs; returns (queued, skipped)"""
+    messages = (
+        (user_info['id'], build_alert_message(
+            user_info, result, result['total_expenses'], user_info['budget'], alert_type
+        )[0])
+        for user_info, result in alerts
+    )
+    return enqueue_messages(messages, alert_type, period, batch_size)
+
+
+def _claim_due(limit, now, keys=None):
+    """Atomically mark up to ``limit`` due messages (optionally only ``keys``) as being sent"""
+    stale = _timestamp(now - CLAIM_TIMEOUT)
+    only_keys = ''
+    params = [_timestamp(now)]
+    if keys is not None:
+        only_keys = f"AND idempotency_key IN ({', '.join('?' * len(keys))})"
+        params.extend(keys)
+    with get_connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('''
+            UPDATE email_outbox SET status = 'pending', claimed_at = NULL
+            WHERE status = 'sending' AND claimed_at < ?
+        ''', (stale,))
+        rows = conn.execute(f'''
+            SELECT id, user_id, recipient, message, attempts FROM email_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ? {only_keys}
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        ''', (*params, limit)).fetchall()
+        conn.executemany(
+            "UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+            [(_timestamp(now), row[0]) for row in rows]
+        )
+    return rows
+
+
+def _record_result(row, error, max_attempts, base_delay):
+    outbox_id, _, _, _, attempts = row
+    now = datetime.now()
+    with get_connection() as conn:
+        if error is None:
+            conn.execute('''
+                UPDATE email_outbox
+                SET status = 'sent', attempts = ?, sent_at = ?, claimed_at = NULL, last_error = NULL
+                WHERE id = ?
+            ''', (attempts + 1, _timestamp(now), outbox_id))
+            return 'sent'
+
+        attempts += 1
+        if attempts >= max_attempts:
+            status, next_attempt = 'failed', now
+        else:
+            delay = min(timedelta(seconds=base_delay * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+            status, next_attempt = 'pending', now + delay
+        conn.execute('''
+            UPDATE email_outbox
+            SET status = ?, attempts = ?, next_attempt_at = ?, claimed_at = NULL, last_error = ?
+            WHERE id = ?
+        ''', (status, attempts, _timestamp(next_attempt), str(error)[:500], outbox_id))
+        return 'failed' if status == 'failed' else 'retrying'
+
+
+def drain_outbox(engine=None, rate_limit=None, max_attempts=None, base_delay=None, batch_size=100,
+                 keys=None):
+    """Deliver every due message; yields (user_id, recipient, outcome, error).
+
+    ``outcome`` is 'sent', 'retrying' (backed off for a later drain) or
+    'failed' (out of attempts). ``keys`` restricts the drain to those
+    idempotency keys. Waits for any other drain on this machine to finish.
+    """
+    if keys is not None and not keys:
+        return
+    engine = engine or get_delivery_engine()
+    limiter = get_rate_limiter(rate_limit or float(os.environ.get('EMAIL_RATE_LIMIT', 10)))
+    max_attempts = max_attempts or int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    base_delay = base_delay or float(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 60))
+
+    with drain_lock():
+        yield from _drain(engine, limiter, max_attempts, base_delay, batch_size, keys)
+
+
+def _drain(engine, limiter, max_attempts, base_delay, batch_size, keys):
+    while True:
+        rows = _claim_due(batch_size, datetime.now(), keys)
+        if not rows:
+            break
+
+        pending = []
+        for row in rows:
+            limiter.acquire()
+            pending.append((row, engine.submit(email.message_from_string(row[3]))))
+
+        for row, future in pending:
+            error = future.exception()
+            outcome = _record_result(row, error, max_attempts, base_delay)
+            OUTBOX_DELIVERIES.inc(outcome)
+            yield row[1], row[2], outcome, error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Deliver queued ExpenseTracker emails')
+    parser.add_argument('command', choices=['drain'])
+    args = parser.parse_args(argv)
+
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+    for _, _, outcome, _ in drain_outbox():
+        counts[outcome] += 1
+    print(f"📬 Outbox drained: {counts}")
+
+
+if __name__ == '__main__':
+    main()
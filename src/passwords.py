@@ -0,0 +1,174 @@
+"""
+Password hashing service for /login and /register.
+
+Hashes are computed on a small, bounded thread pool (hashlib releases the
+GIL while it works), so a burst of logins can occupy at most
+PASSWORD_HASH_WORKERS cores and never starves other requests. At most
+PASSWORD_HASH_QUEUE more requests may wait; beyond that ``HashingBusy`` is
+raised immediately instead of piling up work.
+
+Before any hashing, ``AttemptLimiter`` rejects floods per email and per
+client IP (sliding window, in memory, per process). The IP is the one
+webapp's ProxyFix recovers from X-Forwarded-For (TRUSTED_PROXY_HOPS).
+
+A stored hash whose algorithm or cost differs from PASSWORD_HASH_METHOD is
+transparently replaced on the user's next successful login.
+
+Configuration:
+    PASSWORD_HASH_METHOD    werkzeug method string, e.g. scrypt:32768:8:1 or
+                            pbkdf2:sha256:600000 (default: scrypt)
+    PASSWORD_HASH_WORKERS   concurrent hashes (default: 2)
+    PASSWORD_HASH_QUEUE     requests allowed to wait for a worker (default: 16)
+    PASSWORD_HASH_TIMEOUT   seconds a request waits for its hash (default: 10)
+    LOGIN_ATTEMPTS_PER_EMAIL, LOGIN_ATTEMPTS_PER_IP
+                            attempts per LOGIN_ATTEMPT_WINDOW_SECONDS (default: 10, 50, 300)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt'
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE = 16
+DEFAULT_TIMEOUT = 10
+DEFAULT_ATTEMPTS_PER_EMAIL = 10
+DEFAULT_ATTEMPTS_PER_IP = 50
+DEFAULT_ATTEMPT_WINDOW_SECONDS = 300
+MAX_TRACKED_KEYS = 100_000
+
+
+class HashingBusy(Exception):
+    """The hashing queue is full (or the hash timed out); ask the client to retry"""
+
+
+class PasswordHasher:
+    """Hash and verify passwords on a bounded thread pool"""
+
+    def __init__(self, method=None, workers=None, max_queue=None, timeout=None):
+        self.method = method or os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        workers = workers or int(os.environ.get('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS))
+        max_queue = max_queue if max_queue is not None else int(
+            os.environ.get('PASSWORD_HASH_QUEUE', DEFAULT_QUEUE)
+        )
+        self.timeout = timeout or float(os.environ.get('PASSWORD_HASH_TIMEOUT', DEFAULT_TIMEOUT))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pwhash')
+        # Running + waiting jobs; a full semaphore means the queue is at its limit
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._method_prefix = None
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy('password hashing queue is full')
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy('password hashing timed out')
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._submit(check_password_hash, pwhash, password)
+
+    @property
+    def method_prefix(self):
+        """The ``method$`` prefix hashes get with the current settings (defaults filled in)"""
+        if self._method_prefix is None:
+            # One-off, outside the pool so it can never be refused
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.method_prefix
+
+    def verify_and_update(self, pwhash, password):
+        """Return (valid, new_hash); new_hash is set when the stored hash uses old parameters"""
+        if not self.verify(pwhash, password):
+            return False, None
+        if self.needs_rehash(pwhash):
+            return True, self.hash(password)
+        return True, None
+
+
+class AttemptLimiter:
+    """Sliding-window attempt counter per key, bounded in memory"""
+
+    def __init__(self, limit, window_seconds, max_keys=MAX_TRACKED_KEYS):
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._attempts = OrderedDict()  # key -> deque of attempt times
+        self._lock = threading.Lock()
+
+    def hit(self, key, now=None):
+        """Record an attempt; returns 0 if allowed, else seconds until the next one is"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                attempts = self._attempts[key] = deque()
+                while len(self._attempts) > self.max_keys:
+                    self._attempts.popitem(last=False)
+            self._attempts.move_to_end(key)
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+            if len(attempts) >= self.limit:
+                return attempts[0] + self.window - now
+            attempts.append(now)
+            return 0
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+_hasher = None
+_limiters = None
+_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """Return the process-wide hasher"""
+    global _hasher
+    with _lock:
+        if _hasher is None:
+            _hasher = PasswordHasher()
+        return _hasher
+
+
+def _get_limiters():
+    global _limiters
+    with _lock:
+        if _limiters is None:
+            window = float(os.environ.get('LOGIN_ATTEMPT_WINDOW_SECONDS', DEFAULT_ATTEMPT_WINDOW_SECONDS))
+            _limiters = (
+                AttemptLimiter(int(os.environ.get('LOGIN_ATTEMPTS_PER_EMAIL', DEFAULT_ATTEMPTS_PER_EMAIL)), window),
+                AttemptLimiter(int(os.environ.get('LOGIN_ATTEMPTS_PER_IP', DEFAULT_ATTEMPTS_PER_IP)), window),
+            )
+        return _limiters
+
+
+def check_attempt(email, ip):
+    """Count an attempt for this email and IP; returns seconds to wait (0 = go ahead)"""
+    by_email, by_ip = _get_limiters()
+    retry_after = by_ip.hit(ip or 'unknown')
+    if not retry_after and email:
+        retry_after = by_email.hit(email.strip().lower())
+    return retry_after
+
+
+def clear_attempts(email):
+    """Forget an email's attempts after a successful login"""
+    by_email, _ = _get_limiters()
+    by_email.reset(email.strip().lower())
@@ -0,0 +1,255 @@
+"""
+Opt-in profiling for single requests and whole job runs.
+
+A request is profiled when it carries the profiling token in the
+``X-Profile`` header, or when it is picked at random at
+PROFILE_SAMPLE_RATE. If PROFILE_ALLOWED_USERS is set, only requests from
+those logged-in users are ever profiled. A profiled response names its
+output file in the ``X-Profile-Output`` header. The token is never read
+from the query string, which ends up in access logs, Referer headers and
+browser history; ``X-Profile-Mode`` picks the profiler for one request.
+
+Two profilers are available:
+
+* ``cprofile`` (default) writes a ``.pstats`` file for ``python -m pstats``,
+  snakeviz or gprof2dot;
+* ``sample`` polls the stack every PROFILE_INTERVAL_MS and writes collapsed
+  stacks (``.collapsed``) for flamegraph.pl or speedscope. It has lower
+  overhead on long runs.
+
+Only one profile runs at a time per process; other requests are served
+unprofiled while it runs. When no token and no sample rate are configured
+the request hooks are not installed at all.
+
+Whole runs are profiled from the command line:
+
+    python -m src.profiling send_weekly_alerts [--mode sample] [--dir profiles]
+    python -m src.profiling manipulate_data --expenses app/data/Expenses.csv --income app/data/Income.csv
+
+Configuration (environment variables):
+    PROFILE_DIR            output directory (default: profiles)
+    PROFILE_MODE           cprofile | sample (default: cprofile)
+    PROFILE_TOKEN          secret that turns profiling on for a request
+    PROFILE_SAMPLE_RATE    fraction of requests profiled automatically (default: 0)
+    PROFILE_ALLOWED_USERS  comma-separated user ids or emails
+    PROFILE_INTERVAL_MS    stack sampling interval (default: 5)
+"""
+
+import argparse
+import cProfile
+import hmac
+import itertools
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_DIR = 'profiles'
+DEFAULT_MODE = 'cprofile'
+DEFAULT_INTERVAL_MS = 5
+MODES = ('cprofile', 'sample')
+EXTENSIONS = {'cprofile': '.pstats', 'sample': '.collapsed'}
+
+_active = threading.Lock()  # one profile at a time per process
+_sequence = itertools.count(1)
+
+
+class StackSampler:
+    """Periodically record one thread's Python stack as collapsed 'a;b;c' lines"""
+
+    def __init__(self, thread_id, interval_ms=DEFAULT_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def _output_path(label, mode, directory):
+    os.makedirs(directory, exist_ok=True)
+    safe_label = re.sub(r'[^A-Za-z0-9_.-]+', '-', label).strip('-') or 'run'
+    name = f"{datetime.now():%Y%m%d-%H%M%S}-{safe_label}-{os.getpid()}-{next(_sequence)}{EXTENSIONS[mode]}"
+    return os.path.join(directory, name)
+
+
+@contextmanager
+def profile_run(label, mode=None, directory=None, interval_ms=None):
+    """Profile the enclosed block; yields the output path, or None if a profile is already running"""
+    mode = mode or os.environ.get('PROFILE_MODE', DEFAULT_MODE)
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {', '.join(MODES)}")
+    if not _active.acquire(blocking=False):
+        yield None
+        return
+    try:
+        path = _output_path(label, mode, directory or os.environ.get('PROFILE_DIR', DEFAULT_DIR))
+        if mode == 'sample':
+            sampler = StackSampler(threading.get_ident(), interval_ms or float(
+                os.environ.get('PROFILE_INTERVAL_MS', DEFAULT_INTERVAL_MS)))
+            sampler.start()
+            try:
+                yield path
+            finally:
+                sampler.stop()
+                sampler.write(path)
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield path
+            finally:
+                profiler.disable()
+                profiler.dump_stats(path)
+    finally:
+        _active.release()
+
+
+# -- Flask integration ------------------------------------------------------
+
+class RequestProfiling:
+    """Decides which requests to profile; settings are read once at startup"""
+
+    def __init__(self):
+        self.token = os.environ.get('PROFILE_TOKEN') or None
+        self.sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+        allowed = os.environ.get('PROFILE_ALLOWED_USERS', '')
+        self.allowed_users = {user.strip().lower() for user in allowed.split(',') if user.strip()}
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0
+
+    def wanted(self, request, session):
+        requested = request.headers.get('X-Profile')
+        if requested:
+            # Compare bytes: compare_digest raises TypeError on non-ASCII str
+            if not self.token or not hmac.compare_digest(requested.encode(), self.token.encode()):
+                return False
+        elif not self.sample_rate or random.random() >= self.sample_rate:
+            return False
+        if not self.allowed_users:
+            return True
+        user = {str(session.get('user_id', '')), str(session.get('user_email', '')).lower()}
+        return bool(user & self.allowed_users)
+
+    def before_request(self):
+        from flask import g, request, session
+
+        if not self.wanted(request, session):
+            return
+        mode = request.headers.get('X-Profile-Mode')
+        label = f"{request.endpoint or 'unmatched'}-u{session.get('user_id', 'anon')}"
+        run = profile_run(label, mode=mode if mode in MODES else None)
+        g.profile_output = run.__enter__()
+        g.profile_run = run
+
+    def after_request(self, response):
+        from flask import g
+
+        output = g.get('profile_output')
+        if output:
+            response.headers['X-Profile-Output'] = os.path.basename(output)
+        return response
+
+    def teardown_request(self, error=None):
+        from flask import g
+
+        run = g.pop('profile_run', None)
+        if run is not None:
+            run.__exit__(None, None, None)
+
+
+def init_app(app):
+    """Install the request profiling hooks if profiling is configured"""
+    profiling = RequestProfiling()
+    if profiling.enabled:
+        app.before_request(profiling.before_request)
+        app.after_request(profiling.after_request)
+        app.teardown_request(profiling.teardown_request)
+    return profiling
+
+
+# -- command line -----------------------------------------------------------
+
+def _print_summary(path, mode, seconds, top):
+    print(f"🔬 Profile written to {path} ({seconds:.2f}s)")
+    if mode == 'cprofile':
+        pstats.Stats(path).sort_stats('cumulative').print_stats(top)
+    else:
+        print(f"   Render with: flamegraph.pl {path} > flame.svg (or load it in speedscope)")
+
+
+def _run_alerts(args):
+    from .automation import send_monthly_reports, send_weekly_alerts
+    from .database import configure
+
+    if args.db:
+        configure(path=args.db)
+    return send_weekly_alerts if args.command == 'send_weekly_alerts' else send_monthly_reports
+
+
+def _run_manipulate_data(args):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+    from modules.fetch_csv import read_csv_data
+    from modules.process_data import manipulate_data
+
+    expenses = read_csv_data(args.expenses)
+    income = read_csv_data(args.income)
+    user_input = {'weekly_budget': str(args.weekly_budget), 'tax_year': str(datetime.now().year)}
+    return lambda: manipulate_data(expenses, income, user_input)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile an ExpenseTracker job run')
+    parser.add_argument('command', choices=['send_weekly_alerts', 'send_monthly_reports', 'manipulate_data'])
+    parser.add_argument('--mode', choices=MODES, default=os.environ.get('PROFILE_MODE', DEFAULT_MODE))
+    parser.add_argument('--dir', default=os.environ.get('PROFILE_DIR', DEFAULT_DIR), help='output directory')
+    parser.add_argument('--interval-ms', type=float, help='sampling interval for --mode sample')
+    parser.add_argument('--top', type=int, default=25, help='functions listed after a cProfile run')
+    parser.add_argument('--db', help='database path for the alert runs (default: $DATABASE_PATH)')
+    parser.add_argument('--expenses', default='app/data/Expenses.csv')
+    parser.add_argument('--income', default='app/data/Income.csv')
+    parser.add_argument('--weekly-budget', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    # Loading the inputs is setup, not part of the profiled run
+    job = _run_manipulate_data(args) if args.command == 'manipulate_data' else _run_alerts(args)
+
+    start = time.perf_counter()
+    with profile_run(args.command, mode=args.mode, directory=args.dir, interval_ms=args.interval_ms) as path:
+        job()
+    _print_summary(path, args.mode, time.perf_counter() - start, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""
+Per-user rollup tables for ExpenseTracker.
+
+Every expense and income row is folded into daily, weekly and monthly
+totals per category (income uses its source as the category). Writers call
+``record_transaction`` inside the same transaction as their INSERT, so
+reports read O(periods) rollup rows instead of O(transactions) raw rows.
+
+Expenses are also added to ``monthly_spend``, one row per user and month,
+so the budget check after an insert is a single primary-key lookup.
+
+Backfill or repair with:
+
+    python -m src.rollups rebuild [--user USER_ID] [--db PATH]
+"""
+
+import argparse
+from datetime import date as date_type, datetime, timedelta
+
+from .dashboard_cache import bump_data_version
+from .database import configure, get_connection
+
+PERIOD_TYPES = ('day', 'week', 'month')
+
+# kind -> (source table, column used as the rollup category)
+SOURCES = {
+    'expense': ('expenses', 'category'),
+    'income': ('income', 'source'),
+}
+
+# SQL expressions mirroring period_starts(); weeks start on Monday
+PERIOD_SQL = {
+    'day': "date(date)",
+    'week': "date(date, '-6 days', 'weekday 1')",
+    'month': "strftime('%Y-%m-01', date)",
+}
+
+CREATE_ROLLUPS_SQL = '''
+    CREATE TABLE IF NOT EXISTS rollups (
+        user_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        period_type TEXT NOT NULL,
+        period_start DATE NOT NULL,
+        category TEXT NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, period_type, period_start, kind, category)
+    ) WITHOUT ROWID
+'''
+
+# alerted_at is set once this month's budget alert has been claimed
+CREATE_MONTHLY_SPEND_SQL = '''
+    CREATE TABLE IF NOT EXISTS monthly_spend (
+        user_id INTEGER NOT NULL,
+        month_start DATE NOT NULL,
+        total REAL NOT NULL DEFAULT 0,
+        alerted_at TIMESTAMP,
+        PRIMARY KEY (user_id, month_start)
+    ) WITHOUT ROWID
+'''
+
+
+def monthly_spend_backfill_sql(user_id=None):
+    """Return (sql, params) that recompute monthly_spend totals from the monthly rollups"""
+    where = 'AND user_id = ?' if user_id is not None else ''
+    params = (user_id,) if user_id is not None else ()
+    return f'''
+        INSERT INTO monthly_spend (user_id, month_start, total)
+        SELECT user_id, period_start, SUM(total) FROM rollups
+        WHERE kind = 'expense' AND period_type = 'month' {where}
+        GROUP BY user_id, period_start
+        ON CONFLICT (user_id, month_start) DO UPDATE SET total = excluded.total
+    ''', params
+
+
+# Layouts older rows may hold: forms never checked the date on the server
+LEGACY_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%Y/%m/%d')
+
+
+def _parse_legacy_date(value):
+    for fmt in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def repair_transaction_dates(conn, user_id=None):
+    """Rewrite stored dates SQLite cannot read (e.g. '2025-1-7') as YYYY-MM-DD.
+
+    Rows whose date still cannot be read are left as they are, reported,
+    and skipped by the backfill. Returns {table: [ids left unreadable]}.
+    """
+    where = 'AND user_id = ?' if user_id is not None else ''
+    params = (user_id,) if user_id is not None else ()
+    unreadable = {}
+
+    for table, _ in SOURCES.values():
+        rows = conn.execute(f'SELECT id, date FROM {table} WHERE date(date) IS NULL {where}', params).fetchall()
+        fixed = []
+        for row_id, value in rows:
+            iso = _parse_legacy_date(value)
+            if iso is None:
+                unreadable.setdefault(table, []).append(row_id)
+            else:
+                fixed.append((iso, row_id))
+        conn.executemany(f'UPDATE {table} SET date = ? WHERE id = ?', fixed)
+        if fixed:
+            print(f"🛠️ Normalized {len(fixed)} {table} dates to YYYY-MM-DD")
+
+    for table, ids in unreadable.items():
+        shown = ', '.join(str(row_id) for row_id in ids[:20]) + (', ...' if len(ids) > 20 else '')
+        print(f"⚠️ {len(ids)} {table} rows have unreadable dates and are left out of the rollups (ids: {shown})")
+    return unreadable
+
+
+def backfill_statements(user_id=None):
+    """Return (sql, params) pairs that rebuild rollups from the raw tables
+
+    Rows with a date SQLite cannot read are skipped; run
+    ``repair_transaction_dates`` first to normalize and report them.
+    """
+    where = 'WHERE date(date) IS NOT NULL'
+    if user_id is not None:
+        where += ' AND user_id = ?'
+    params = (user_id,) if user_id is not None else ()
+    statements = []
+
+    for kind, (table, category_col) in SOURCES.items():
+        for period_type, period_sql in PERIOD_SQL.items():
+            statements.append((f'''
+                INSERT OR REPLACE INTO rollups
+                    (user_id, kind, period_type, period_start, category, total, count)
+                SELECT user_id, '{kind}', '{period_type}', {period_sql}, {category_col},
+                       SUM(amount), COUNT(*)
+                FROM {table} {where}
+                GROUP BY user_id, {period_sql}, {category_col}
+            ''', params))
+
+    return statements
+
+
+def period_starts(date):
+    """Return {period_type: period_start} ISO strings for a transaction date"""
+    if isinstance(date, datetime):
+        date = date.date()
+    elif not isinstance(date, date_type):
+        date = date_type.fromisoformat(str(date)[:10])
+
+    return {
+        'day': date.isoformat(),
+        'week': (date - timedelta(days=date.weekday())).isoformat(),
+        'month': date.replace(day=1).isoformat(),
+    }
+
+
+def record_transaction(cursor, user_id, kind, category, amount, date):
+    """Fold one new transaction into the rollups.
+
+    Must be called on the same connection/transaction as the INSERT into
+    the raw table so the two can never drift apart.
+    """
+    starts = period_starts(date)
+    rows = [
+        (user_id, kind, period_type, period_start, category, amount)
+        for period_type, period_start in starts.items()
+    ]
+    cursor.executemany('''
+        INSERT INTO rollups (user_id, kind, period_type, period_start, category, total, count)
+        VALUES (?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT (user_id, period_type, period_start, kind, category)
+        DO UPDATE SET total = total + excluded.total, count = count + 1
+    ''', rows)
+    if kind == 'expense':
+        cursor.execute('''
+            INSERT INTO monthly_spend (user_id, month_start, total) VALUES (?, ?, ?)
+            ON CONFLICT (user_id, month_start) DO UPDATE SET total = total + excluded.total
+        ''', (user_id, starts['month'], amount))
+
+
+def rebuild_rollups(conn, user_id=None):
+    """Recompute rollups from the raw tables for one user or everyone"""
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
+        cursor.execute(CREATE_ROLLUPS_SQL)
+        repair_transaction_dates(conn, user_id)
+        if user_id is None:
+            cursor.execute('DELETE FROM rollups')
+        else:
+            cursor.execute('DELETE FROM rollups WHERE user_id = ?', (user_id,))
+        for sql, params in backfill_statements(user_id):
+            cursor.execute(sql, params)
+        # Keep alerted_at, so a rebuild never re-sends this month's budget alert
+        cursor.execute(CREATE_MONTHLY_SPEND_SQL)
+        if user_id is None:
+            cursor.execute('UPDATE monthly_spend SET total = 0')
+        else:
+            cursor.execute('UPDATE monthly_spend SET total = 0 WHERE user_id = ?', (user_id,))
+        cursor.execute(*monthly_spend_backfill_sql(user_id))
+        # Cached dashboards were built from the old rollups
+        if user_id is None:
+            cursor.execute('UPDATE users SET data_version = data_version + 1')
+        else:
+            bump_data_version(cursor, user_id)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def get_totals(conn, user_id, as_of=None):
+    """Return lifetime (total_expenses, total_income) from monthly rollups
+
+    With ``as_of`` (an ISO date) only transactions dated up to and including
+    that day count: whole months before it, then its month's daily rollups.
+    """
+    cursor = conn.cursor()
+    if as_of is None:
+        cursor.execute('''
+            SELECT kind, SUM(total) FROM rollups
+            WHERE user_id = ? AND period_type = 'month'
+            GROUP BY kind
+        ''', (user_id,))
+    else:
+        as_of_month = as_of[:8] + '01'
+        cursor.execute('''
+            SELECT kind, SUM(total) FROM rollups
+            WHERE user_id = ? AND (
+                (period_type = 'month' AND period_start < ?)
+                OR (period_type = 'day' AND period_start >= ? AND period_start <= ?)
+            )
+            GROUP BY kind
+        ''', (user_id, as_of_month, as_of_month, as_of))
+    totals = dict(cursor.fetchall())
+    return totals.get('expense', 0), totals.get('income', 0)
+
+
+def get_period_summary(conn, user_id, now=None):
+    """Return the weekly/monthly/lifetime figures used by email alerts.
+
+    Same keys and windows as automation.calculate_financial_summary: the
+    last 7 and last 30 days, read from the daily rollups. Nothing dated
+    after ``now`` counts, so a late run reports what was known when due.
+    """
+    today = (now or datetime.now()).date()
+    as_of = today.isoformat()
+    week_start = (today - timedelta(days=6)).isoformat()
+    month_start = (today - timedelta(days=29)).isoformat()
+
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT
+            COALESCE(SUM(CASE WHEN kind = 'expense' AND period_start >= ? THEN total END), 0),
+            COALESCE(SUM(CASE WHEN kind = 'expense' THEN total END), 0),
+            COALESCE(SUM(CASE WHEN kind = 'income' THEN total END), 0)
+        FROM rollups
+        WHERE user_id = ? AND period_type = 'day' AND period_start >= ? AND period_start <= ?
+    ''', (week_start, user_id, month_start, as_of))
+    weekly_expenses, monthly_expenses, monthly_income = cursor.fetchone()
+    total_expenses, total_income = get_totals(conn, user_id, as_of)
+
+    return {
+        'weekly_expenses': weekly_expenses,
+        'monthly_expenses': monthly_expenses,
+        'monthly_income': monthly_income,
+        'monthly_savings': monthly_income - monthly_expenses,
+        'total_expenses': total_expenses,
+        'total_income': total_income
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain ExpenseTracker rollup tables')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('--user', type=int, help='only rebuild this user id')
+    parser.add_argument('--db', help='database path (default: $DATABASE_PATH)')
+    args = parser.parse_args(argv)
+
+    if args.db:
+        configure(path=args.db)
+    from .migrations import apply_migrations
+
+    with get_connection() as conn:
+        apply_migrations(conn)
+        rebuild_rollups(conn, args.user)
+    target = f"user {args.user}" if args.user is not None else "all users"
+    print(f"✅ Rollups rebuilt for {target}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""
+Persistent job scheduler for the alert automation.
+
+Jobs sit in a timer heap and the scheduler thread sleeps until the earliest
+one is due, instead of polling. Each job's next due time, last run and
+outcome are stored in the ``scheduled_jobs`` table, so a restart resumes
+where the previous process stopped:
+
+* Occurrences that came due while nothing was running are caught up on
+  startup, oldest first, up to the job's ``catch_up`` limit. The job is
+  called with the occurrence's due time, so a late weekly alert still
+  covers (and is de-duplicated for) the week it was meant for.
+* A run that was interrupted by a crash is replayed.
+* A job is never started while its previous run is still going: runs are
+  claimed in the database and a due time that arrives mid-run is skipped.
+
+Inspect job state with:
+
+    python -m src.scheduler status [--db PATH]
+"""
+
+import argparse
+import calendar
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as time_type, timedelta
+
+from .database import configure, get_connection
+
+CREATE_SCHEDULED_JOBS_SQL = '''
+    CREATE TABLE IF NOT EXISTS scheduled_jobs (
+        name TEXT PRIMARY KEY,
+        next_due_at TIMESTAMP NOT NULL,
+        last_due_at TIMESTAMP,
+        last_started_at TIMESTAMP,
+        last_finished_at TIMESTAMP,
+        last_status TEXT,
+        last_error TEXT,
+        running_since TIMESTAMP,
+        run_count INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+# Upper bound on one sleep, so wall-clock jumps (suspend, NTP) are noticed
+MAX_SLEEP_SECONDS = 300
+
+
+def _parse_time(at):
+    hour, minute = (int(part) for part in at.split(':'))
+    return time_type(hour, minute)
+
+
+class Weekly:
+    """Every week on ``weekday`` (Monday=0) at HH:MM local time"""
+
+    def __init__(self, weekday, at):
+        self.weekday = weekday
+        self.at = _parse_time(at)
+
+    def next_after(self, moment):
+        days_ahead = (self.weekday - moment.weekday()) % 7
+        candidate = datetime.combine(moment.date() + timedelta(days=days_ahead), self.at)
+        return candidate if candidate > moment else candidate + timedelta(days=7)
+
+    def __str__(self):
+        return f"every {calendar.day_name[self.weekday]} at {self.at:%H:%M}"
+
+
+class Monthly:
+    """Every month on ``day`` (clamped to the month's length) at HH:MM local time"""
+
+    def __init__(self, day, at):
+        self.day = day
+        self.at = _parse_time(at)
+
+    def _occurrence(self, year, month):
+        day = min(self.day, calendar.monthrange(year, month)[1])
+        return datetime.combine(datetime(year, month, day).date(), self.at)
+
+    def next_after(self, moment):
+        candidate = self._occurrence(moment.year, moment.month)
+        if candidate > moment:
+            return candidate
+        year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+        return self._occurrence(year, month)
+
+    def __str__(self):
+        return f"monthly on day {self.day} at {self.at:%H:%M}"
+
+
+class Every:
+    """A fixed interval"""
+
+    def __init__(self, **interval):
+        self.interval = timedelta(**interval)
+
+    def next_after(self, moment):
+        return moment + self.interval
+
+    def __str__(self):
+        return f"every {self.interval}"
+
+
+class Job:
+    """A named callable run on a schedule; ``func(due)`` gets the occurrence's due time"""
+
+    def __init__(self, name, schedule, func, catch_up=1, max_runtime=timedelta(hours=6)):
+        self.name = name
+        self.schedule = schedule
+        self.func = func
+        self.catch_up = max(1, catch_up)  # most missed occurrences replayed at once
+        self.max_runtime = max_runtime  # a claim older than this belongs to a dead run
+
+
+def _row_to_dict(cursor, row):
+    return dict(zip([col[0] for col in cursor.description], row))
+
+
+class Scheduler:
+    """Timer-heap scheduler with job state persisted in SQLite"""
+
+    def __init__(self, jobs, clock=datetime.now):
+        self.jobs = {job.name: job for job in jobs}
+        self.clock = clock
+        self._heap = []
+        self._wakeup = threading.Condition()
+        self._stopped = False
+        self._running = set()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.jobs)), thread_name_prefix='job')
+
+    # -- persistence -----------------------------------------------------
+
+    def _load(self):
+        """Create missing job rows and recover from an interrupted process"""
+        now = self.clock()
+        with get_connection() as conn:
+            conn.execute(CREATE_SCHEDULED_JOBS_SQL)
+            for job in self.jobs.values():
+                row = conn.execute(
+                    'SELECT next_due_at, last_due_at, running_since FROM scheduled_jobs WHERE name = ?',
+                    (job.name,)
+                ).fetchone()
+                if row is None:
+                    next_due = job.schedule.next_after(now)
+                    conn.execute(
+                        'INSERT INTO scheduled_jobs (name, next_due_at) VALUES (?, ?)',
+                        (job.name, next_due.isoformat(sep=' '))
+                    )
+                else:
+                    next_due = datetime.fromisoformat(row[0])
+                    if row[2] is not None and row[1] is not None:
+                        # Only the elected leader schedules, so a leftover claim means
+                        # that process died mid-run: replay the interrupted occurrence
+                        print(f"⚠️ Job '{job.name}' was interrupted at {row[2]}, replaying it")
+                        next_due = min(next_due, datetime.fromisoformat(row[1]))
+                        conn.execute(
+                            "UPDATE scheduled_jobs SET running_since = NULL, last_status = 'interrupted', "
+                            "next_due_at = ? WHERE name = ?",
+                            (next_due.isoformat(sep=' '), job.name)
+                        )
+                heapq.heappush(self._heap, (next_due, job.name))
+
+    def _claim(self, job, due, next_due, now):
+        """Mark the job as running and advance its next due time; False if it is already running"""
+        stale_before = (now - job.max_runtime).isoformat(sep=' ')
+        with get_connection() as conn:
+            cursor = conn.execute('''
+                UPDATE scheduled_jobs
+                SET running_since = ?, last_due_at = ?, last_started_at = ?, next_due_at = ?
+                WHERE name = ? AND (running_since IS NULL OR running_since < ?)
+            ''', (now.isoformat(sep=' '), due.isoformat(sep=' '), now.isoformat(sep=' '),
+                  next_due.isoformat(sep=' '), job.name, stale_before))
+            return cursor.rowcount > 0
+
+    def _reschedule(self, job, next_due):
+        with get_connection() as conn:
+            conn.execute('UPDATE scheduled_jobs SET next_due_at = ? WHERE name = ?',
+                         (next_due.isoformat(sep=' '), job.name))
+
+    def _finish(self, job, error):
+        with get_connection() as conn:
+            conn.execute('''
+                UPDATE scheduled_jobs
+                SET running_since = NULL, last_finished_at = ?, last_status = ?, last_error = ?,
+                    run_count = run_count + 1
+                WHERE name = ?
+            ''', (self.clock().isoformat(sep=' '), 'error' if error else 'ok',
+                  str(error) if error else None, job.name))
+
+    # -- execution -------------------------------------------------------
+
+    def _missed(self, job, due, now):
+        """Return the occurrences from ``due`` up to now, keeping the newest catch_up"""
+        occurrences = deque(maxlen=job.catch_up)
+        while due <= now:
+            occurrences.append(due)
+            due = job.schedule.next_after(due)
+        return list(occurrences)
+
+    def _run(self, job, occurrences):
+        error = None
+        try:
+            for due in occurrences:
+                print(f"▶️ Running job '{job.name}' for {due:%Y-%m-%d %H:%M}")
+                job.func(due)
+        except Exception as e:
+            error = e
+            print(f"❌ Job '{job.name}' failed: {e}")
+        finally:
+            self._finish(job, error)
+            with self._wakeup:
+                self._running.discard(job.name)
+
+    def _dispatch(self, job, due):
+        now = self.clock()
+        occurrences = self._missed(job, due, now)
+        next_due = job.schedule.next_after(now)
+        heapq.heappush(self._heap, (next_due, job.name))
+
+        if job.name in self._running or not self._claim(job, occurrences[-1], next_due, now):
+            self._reschedule(job, next_due)
+            print(f"⏭️ Job '{job.name}' is still running, skipping the run due {due:%Y-%m-%d %H:%M}")
+            return
+        if len(occurrences) > 1 or now - due > timedelta(minutes=5):
+            print(f"⏰ Catching up {len(occurrences)} missed run(s) of '{job.name}'")
+        self._running.add(job.name)
+        self._executor.submit(self._run, job, occurrences)
+
+    def _loop(self):
+        with self._wakeup:
+            while not self._stopped:
+                due, name = self._heap[0]
+                wait = (due - self.clock()).total_seconds()
+                if wait > 0:
+                    self._wakeup.wait(min(wait, MAX_SLEEP_SECONDS))
+                    continue
+                heapq.heappop(self._heap)
+                self._dispatch(self.jobs[name], due)
+
+    def start(self):
+        """Load job state and start the scheduler thread"""
+        self._load()
+        thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self, wait=True):
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify_all()
+        self._executor.shutdown(wait=wait)
+
+
+def get_job_status(conn):
+    """Return every persisted job row as a dict"""
+    cursor = conn.execute('SELECT * FROM scheduled_jobs ORDER BY next_due_at')
+    return [_row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect the ExpenseTracker job scheduler')
+    parser.add_argument('command', choices=['status'])
+    parser.add_argument('--db', help='database path (default: $DATABASE_PATH)')
+    args = parser.parse_args(argv)
+
+    if args.db:
+        configure(path=args.db)
+
+    with get_connection() as conn:
+        conn.execute(CREATE_SCHEDULED_JOBS_SQL)
+        jobs = get_job_status(conn)
+    if not jobs:
+        print("No jobs have been scheduled yet.")
+    for job in jobs:
+        state = f"running since {job['running_since']}" if job['running_since'] else (job['last_status'] or 'never run')
+        print(f"{job['name']:<16} next {job['next_due_at']}  last {job['last_due_at'] or '-'}  "
+              f"{state}  runs {job['run_count']}")
+        if job['last_error']:
+            print(f"{'':<16} error: {job['last_error']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Sharded alert runs across worker processes.
+
+Users are split into contiguous id ranges of roughly equal size. Each range
+is handed to a ProcessPoolExecutor worker with its own database connection,
+which computes the summaries and renders the alert emails (the CPU-bound
+part of a run) and streams them back in small batches through a bounded
+queue. The parent process is the single delivery stage: it consumes the
+stream in arrival order, so the outbox still has exactly one writer.
+
+ALERT_SHARDS sets the number of shards (default 1 = render in-process;
+0 = one per CPU core).
+"""
+
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from .database import configure, get_connection, get_database_path
+from .email_templates import get_renderer
+from .metrics import ALERT_SHARD_SECONDS
+from .summary_engine import iter_user_summaries
+
+DEFAULT_SHARDS = 1
+STREAM_BATCH_SIZE = 200
+QUEUE_BATCHES_PER_SHARD = 4  # backpressure: workers block when delivery falls behind
+POLL_SECONDS = 1.0
+
+# Set in each worker by _init_worker
+_results = None
+
+
+def alert_shards():
+    """Configured shard count (ALERT_SHARDS; 0 means one per CPU core)"""
+    shards = int(os.environ.get('ALERT_SHARDS', DEFAULT_SHARDS))
+    return shards if shards > 0 else (os.cpu_count() or 1)
+
+
+def shard_ranges(conn, shards):
+    """Split user ids into at most ``shards`` inclusive (min_id, max_id) ranges of similar size"""
+    rows = conn.execute('''
+        SELECT MIN(id), MAX(id), COUNT(*) FROM (
+            SELECT id, NTILE(?) OVER (ORDER BY id) AS shard FROM users
+        )
+        GROUP BY shard
+        ORDER BY shard
+    ''', (shards,)).fetchall()
+    return [(min_id, max_id) for min_id, max_id, _ in rows]
+
+
+class ShardReport:
+    """Timing for one shard: users rendered and wall-clock seconds in the worker"""
+
+    def __init__(self, shard, min_id, max_id, users=0, seconds=0.0, pid=None, error=None):
+        self.shard = shard
+        self.min_id = min_id
+        self.max_id = max_id
+        self.users = users
+        self.seconds = seconds
+        self.pid = pid
+        self.error = error
+
+    @property
+    def users_per_second(self):
+        return self.users / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        outcome = f"failed: {self.error}" if self.error else (
+            f"{self.users:,} users in {self.seconds:.2f}s ({self.users_per_second:,.0f}/s)"
+        )
+        return f"🧩 Shard {self.shard} (users {self.min_id}-{self.max_id}, pid {self.pid}): {outcome}"
+
+
+def _init_worker(results, db_path):
+    global _results
+    _results = results
+    configure(path=db_path, pool_size=1)
+
+
+def _render_shard(shard, min_id, max_id, alert_type, now):
+    """Worker: render every alert in one id range and stream them to the parent"""
+    start = time.perf_counter()
+    report = ShardReport(shard, min_id, max_id, pid=os.getpid())
+    renderer = get_renderer()
+    batch = []
+    try:
+        for user_info, result in iter_user_summaries(now=now, min_user_id=min_id, max_user_id=max_id):
+            msg, status = renderer.build_message(
+                user_info, result, result['total_expenses'], user_info['budget'], alert_type
+            )
+            batch.append((user_info, result, msg, status))
+            if len(batch) >= STREAM_BATCH_SIZE:
+                _results.put(('batch', shard, batch))
+                report.users += len(batch)
+                batch = []
+        if batch:
+            _results.put(('batch', shard, batch))
+            report.users += len(batch)
+    except Exception as e:
+        report.error = str(e)
+    report.seconds = time.perf_counter() - start
+    _results.put(('done', shard, report))
+
+
+class ShardedAlertRun:
+    """Iterate (user_info, result, msg, status) for every user, rendered across shards.
+
+    Results arrive shard-interleaved as workers finish batches. Per-shard
+    timings are printed as each shard completes and kept in ``reports``.
+    """
+
+    def __init__(self, alert_type, now=None, shards=None):
+        self.alert_type = alert_type
+        self.now = now
+        self.shards = shards or alert_shards()
+        self.reports = []
+        self.elapsed = 0.0
+
+    def __iter__(self):
+        start = time.perf_counter()
+        with get_connection() as conn:
+            ranges = shard_ranges(conn, self.shards)
+        if not ranges:
+            return
+
+        context = get_context('spawn')  # never fork a process that runs scheduler/SMTP threads
+        results = context.Queue(maxsize=len(ranges) * QUEUE_BATCHES_PER_SHARD)
+        pool = ProcessPoolExecutor(max_workers=len(ranges), mp_context=context,
+                                   initializer=_init_worker, initargs=(results, get_database_path()))
+        finished = False
+        try:
+            futures = {
+                pool.submit(_render_shard, shard, min_id, max_id, self.alert_type, self.now): (shard, min_id, max_id)
+                for shard, (min_id, max_id) in enumerate(ranges, start=1)
+            }
+            pending = set(futures.values())
+            while pending:
+                try:
+                    kind, shard, payload = results.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    # A worker that died without reporting (e.g. killed) fails its future
+                    for future, key in futures.items():
+                        if key in pending and future.done() and future.exception() is not None:
+                            pending.discard(key)
+                            self._report(ShardReport(*key, error=future.exception()))
+                    continue
+                if kind == 'batch':
+                    yield from payload
+                else:
+                    pending.discard(next(key for key in pending if key[0] == shard))
+                    self._report(payload)
+            finished = True
+        finally:
+            if finished:
+                pool.shutdown(wait=True)
+            else:
+                # The consumer raised or stopped early: workers may be blocked on a
+                # full queue nobody reads, so waiting for them would hang forever
+                processes = list((pool._processes or {}).values())
+                pool.shutdown(wait=False, cancel_futures=True)
+                for process in processes:
+                    process.terminate()
+                for process in processes:
+                    process.join()
+            results.close()
+
+        self.elapsed = time.perf_counter() - start
+        users = sum(report.users for report in self.reports)
+        print(f"🧩 {len(ranges)} shards rendered {users:,} alerts in {self.elapsed:.2f}s")
+        failed = [report for report in self.reports if report.error]
+        if failed:
+            # Alerts from the other shards were delivered; a rerun only adds the missing ones
+            raise RuntimeError(f"{len(failed)} of {len(ranges)} shards failed")
+
+    def _report(self, report):
+        self.reports.append(report)
+        ALERT_SHARD_SECONDS.observe(report.seconds)
+        print(report)
@@ -0,0 +1,110 @@
+"""
+Batch summary engine for the scheduled alert runs.
+
+Computes the weekly, monthly and lifetime figures for every user in one
+grouped SQL query over the rollup tables and streams the results back one
+user at a time, replacing the per-user connection + queries of the old
+get_user_data loop (3N+1 queries and N connections per run).
+"""
+
+from datetime import datetime, timedelta
+
+from .database import get_connection
+
+BATCH_SUMMARY_SQL = '''
+    SELECT
+        u.id, u.email, u.name, u.budget,
+        COALESCE(recent.weekly_expenses, 0),
+        COALESCE(recent.monthly_expenses, 0),
+        COALESCE(recent.monthly_income, 0),
+        COALESCE(lifetime.total_expenses, 0),
+        COALESCE(lifetime.total_income, 0)
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id,
+               SUM(CASE WHEN kind = 'expense' AND period_start >= :week_start THEN total END) AS weekly_expenses,
+               SUM(CASE WHEN kind = 'expense' THEN total END) AS monthly_expenses,
+               SUM(CASE WHEN kind = 'income' THEN total END) AS monthly_income
+        FROM rollups
+        WHERE period_type = 'day' AND period_start >= :month_start AND period_start <= :as_of
+        GROUP BY user_id
+    ) recent ON recent.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id,
+               SUM(CASE WHEN kind = 'expense' THEN total END) AS total_expenses,
+               SUM(CASE WHEN kind = 'income' THEN total END) AS total_income
+        FROM rollups
+        WHERE (period_type = 'month' AND period_start < :as_of_month)
+           OR (period_type = 'day' AND period_start >= :as_of_month AND period_start <= :as_of)
+        GROUP BY user_id
+    ) lifetime ON lifetime.user_id = u.id
+    {where}
+    ORDER BY u.id
+'''
+
+
+def summary_windows(now=None):
+    """Return the bounds of the 7- and 30-day windows ending today
+
+    ``as_of`` (today) caps every window, lifetime totals included, so a
+    catch-up run ignores transactions dated after the time it was due.
+    Lifetime totals add whole months before ``as_of_month`` to that month's
+    daily rollups up to ``as_of``.
+    """
+    today = (now or datetime.now()).date()
+    return {
+        'week_start': (today - timedelta(days=6)).isoformat(),
+        'month_start': (today - timedelta(days=29)).isoformat(),
+        'as_of': today.isoformat(),
+        'as_of_month': today.replace(day=1).isoformat(),
+    }
+
+
+def _row_to_summary(row):
+    (user_id, email, name, budget, weekly_expenses, monthly_expenses,
+     monthly_income, total_expenses, total_income) = row
+
+    user_info = {
+        'id': user_id,
+        'email': email,
+        'name': name,
+        'budget': budget
+    }
+    result = {
+        'weekly_expenses': weekly_expenses,
+        'monthly_expenses': monthly_expenses,
+        'monthly_income': monthly_income,
+        'monthly_savings': monthly_income - monthly_expenses,
+        'total_expenses': total_expenses,
+        'total_income': total_income
+    }
+    return user_info, result
+
+
+def iter_user_summaries(now=None, min_user_id=None, max_user_id=None, batch_size=500):
+    """Yield (user_info, result) for every user, ordered by user id.
+
+    ``result`` has the same keys as automation.calculate_financial_summary.
+    Rows are fetched in batches so memory stays flat however many users
+    there are; the optional id bounds (inclusive) restrict the run to a
+    slice of users.
+    """
+    params = summary_windows(now)
+    conditions = []
+    if min_user_id is not None:
+        conditions.append('u.id >= :min_user_id')
+        params['min_user_id'] = min_user_id
+    if max_user_id is not None:
+        conditions.append('u.id <= :max_user_id')
+        params['max_user_id'] = max_user_id
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(BATCH_SUMMARY_SQL.format(where=where), params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield _row_to_summary(row)
@@ -1,65 +1,43 @@
 import os
 import sqlite3
-import pandas as pd
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, render_template, request, redirect, url_for, flash, session, make_response
 import json
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import your existing modules (simplified for multi-user)
 from .email_service import send_email_alert
+from .api import api
+from .budget_alerts import check_budget_breach, drain_soon
+from .csv_import import IMPORT_SCHEMAS, import_uploaded_file
+from .dashboard_cache import bump_data_version, dashboard_cache, dashboard_etag, get_data_version
+from .dashboard_data import get_dashboard_data
+from .database import get_connection
+from .metrics import init_app as init_metrics, log_event
+from .migrations import apply_migrations, check_query_plans
+from .passwords import HashingBusy, check_attempt, clear_attempts, get_password_hasher
+from .profiling import init_app as init_profiling
+from .rollups import record_transaction
 
 app = Flask(__name__, template_folder='templates')
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-this')  # Use environment variable in production
+# Behind Heroku's router (or nginx) the client address is in X-Forwarded-For.
+# Off by default: without a proxy that header is client-controlled, so trust
+# only the hops a deployment declares (the Procfile sets 1 for Heroku)
+_proxy_hops = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+if _proxy_hops:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=_proxy_hops)
+app.register_blueprint(api)
+init_metrics(app)  # per-request timing and /metrics
+init_profiling(app)  # opt-in per-request profiles (PROFILE_TOKEN / PROFILE_SAMPLE_RATE)
 
 # Database setup
 def init_db():
     """Initialize the database with user and transaction tables"""
-    conn = sqlite3.connect('expensetracker.db')
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            name TEXT NOT NULL,
-            budget REAL DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Expenses table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS expenses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            amount REAL NOT NULL,
-            category TEXT NOT NULL,
-            description TEXT,
-            date DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    # Income table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS income (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            amount REAL NOT NULL,
-            source TEXT NOT NULL,
-            description TEXT,
-            date DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        # Bring the schema up to date and flag hot queries missing an index
+        apply_migrations(conn)
+        check_query_plans(conn)
 
 @app.route('/')
 def index():
@@ -68,6 +46,18 @@ def index():
         return redirect(url_for('dashboard'))
     return render_template('index.html')
 
+def _too_many_attempts(template, retry_after):
+    flash(f'Too many attempts. Please try again in {int(retry_after) + 1} seconds.', 'error')
+    response = make_response(render_template(template), 429)
+    response.headers['Retry-After'] = str(int(retry_after) + 1)
+    return response
+
+def _server_busy(template):
+    flash('The server is busy. Please try again in a moment.', 'error')
+    response = make_response(render_template(template), 503)
+    response.headers['Retry-After'] = '5'
+    return response
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     """User registration"""
@@ -77,18 +67,23 @@ def register():
         name = request.form['name']
         budget = float(request.form.get('budget', 0))
         
+        # Reject floods before spending CPU on hashing
+        retry_after = check_attempt(None, request.remote_addr)
+        if retry_after:
+            return _too_many_attempts('register.html', retry_after)
+        
         # Hash password
-        password_hash = generate_password_hash(password)
+        try:
+            password_hash = get_password_hasher().hash(password)
+        except HashingBusy:
+            return _server_busy('register.html')
         
         try:
-            conn = sqlite3.connect('expensetracker.db')
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO users (email, password_hash, name, budget) VALUES (?, ?, ?, ?)',
-                (email, password_hash, name, budget)
-            )
-            conn.commit()
-            conn.close()
+            with get_connection() as conn:
+                conn.execute(
+                    'INSERT INTO users (email, password_hash, name, budget) VALUES (?, ?, ?, ?)',
+                    (email, password_hash, name, budget)
+                )
             
             flash('Registration successful! Please login.', 'success')
             return redirect(url_for('login'))
@@ -105,13 +100,27 @@ def login():
         email = request.form['email']
         password = request.form['password']
         
-        conn = sqlite3.connect('expensetracker.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, password_hash, name FROM users WHERE email = ?', (email,))
-        user = cursor.fetchone()
-        conn.close()
+        # Reject floods before spending CPU on hashing
+        retry_after = check_attempt(email, request.remote_addr)
+        if retry_after:
+            return _too_many_attempts('login.html', retry_after)
         
-        if user and check_password_hash(user[1], password):
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, password_hash, name FROM users WHERE email = ?', (email,))
+            user = cursor.fetchone()
+        
+        try:
+            valid, new_hash = get_password_hasher().verify_and_update(user[1], password) if user else (False, None)
+        except HashingBusy:
+            return _server_busy('login.html')
+        
+        if valid:
+            if new_hash:
+                # Hash parameters changed since this password was stored
+                with get_connection() as conn:
+                    conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (new_hash, user[0]))
+            clear_attempts(email)
             session['user_id'] = user[0]
             session['user_email'] = email
             session['user_name'] = user[2]
@@ -137,44 +146,34 @@ def dashboard():
     
     user_id = session['user_id']
     
-    # Get user's financial data
-    conn = sqlite3.connect('expensetracker.db')
-    
-    # Get expenses
-    expenses_df = pd.read_sql_query(
-        'SELECT amount, category, description, date FROM expenses WHERE user_id = ? ORDER BY date DESC',
-        conn, params=(user_id,)
-    )
-    
-    # Get income
-    income_df = pd.read_sql_query(
-        'SELECT amount, source, description, date FROM income WHERE user_id = ? ORDER BY date DESC',
-        conn, params=(user_id,)
-    )
-    
-    # Get user budget
-    cursor = conn.cursor()
-    cursor.execute('SELECT budget FROM users WHERE id = ?', (user_id,))
-    result = cursor.fetchone()
-    budget = result[0] if result else 0.0
-    conn.close()
-    
-    # Calculate totals
-    total_expenses = expenses_df['amount'].sum() if not expenses_df.empty else 0
-    total_income = income_df['amount'].sum() if not income_df.empty else 0
-    savings = total_income - total_expenses
-    
-    # Recent transactions (last 10)
-    recent_expenses = expenses_df.head(10).to_dict('records') if not expenses_df.empty else []
-    recent_income = income_df.head(10).to_dict('records') if not income_df.empty else []
+    with get_connection() as conn:
+        version = get_data_version(conn, user_id)
+        etag = dashboard_etag(user_id, version)
+        # Pending flash messages must be rendered, so never answer 304 with them queued
+        if request.if_none_match.contains(etag) and not session.get('_flashes'):
+            dashboard_cache.record_not_modified()
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        # Get user's financial data (SQL aggregates + indexed recent rows)
+        data = dashboard_cache.get(user_id, version)
+        if data is None:
+            data = get_dashboard_data(conn, user_id)
+            dashboard_cache.put(user_id, version, data)
     
-    return render_template('dashboard.html',
-                         total_expenses=total_expenses,
-                         total_income=total_income,
-                         savings=savings,
-                         budget=budget,
-                         recent_expenses=recent_expenses,
-                         recent_income=recent_income)
+    response = make_response(render_template('dashboard.html', **data))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def _form_date(value):
+    """Return the form's YYYY-MM-DD date, or None if it is not a real date"""
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return None
 
 @app.route('/add_expense', methods=['GET', 'POST'])
 def add_expense():
@@ -187,18 +186,27 @@ def add_expense():
         amount = float(request.form['amount'])
         category = request.form['category']
         description = request.form.get('description', '')
-        date = request.form['date']
+        date = _form_date(request.form['date'])
+        if date is None:
+            flash('Please enter a valid date (YYYY-MM-DD).', 'error')
+            return render_template('add_expense.html')
         
-        conn = sqlite3.connect('expensetracker.db')
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO expenses (user_id, amount, category, description, date) VALUES (?, ?, ?, ?, ?)',
-            (user_id, amount, category, description, date)
-        )
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT INTO expenses (user_id, amount, category, description, date) VALUES (?, ?, ?, ?, ?)',
+                (user_id, amount, category, description, date)
+            )
+            record_transaction(cursor, user_id, 'expense', category, amount, date)
+            bump_data_version(cursor, user_id)
+            # O(1) check against this month's running total; queues at most one alert per month
+            breach = check_budget_breach(conn, user_id, date)
         
         flash(f'Expense of ${amount:.2f} added successfully!', 'success')
+        if breach:
+            drain_soon([breach])
+            flash(f'⚠️ You have used {breach.percent_used:.0f}% of your ${breach.budget:.2f} monthly budget '
+                  f'(${breach.spent:.2f} spent this month).', 'error')
         return redirect(url_for('dashboard'))
     
     return render_template('add_expense.html')
@@ -214,22 +222,61 @@ def add_income():
         amount = float(request.form['amount'])
         source = request.form['source']
         description = request.form.get('description', '')
-        date = request.form['date']
+        date = _form_date(request.form['date'])
+        if date is None:
+            flash('Please enter a valid date (YYYY-MM-DD).', 'error')
+            return render_template('add_income.html')
         
-        conn = sqlite3.connect('expensetracker.db')
-        cursor = conn.cursor()
-        cursor.execute(
-            'INSERT INTO income (user_id, amount, source, description, date) VALUES (?, ?, ?, ?, ?)',
-            (user_id, amount, source, description, date)
-        )
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT INTO income (user_id, amount, source, description, date) VALUES (?, ?, ?, ?, ?)',
+                (user_id, amount, source, description, date)
+            )
+            record_transaction(cursor, user_id, 'income', source, amount, date)
+            bump_data_version(cursor, user_id)
         
         flash(f'Income of ${amount:.2f} added successfully!', 'success')
         return redirect(url_for('dashboard'))
     
     return render_template('add_income.html')
 
+@app.route('/import', methods=['GET', 'POST'])
+def import_data():
+    """Bulk import expenses or income from a CSV file"""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    if request.method == 'POST':
+        user_id = session['user_id']
+        kind = request.form.get('kind')
+        upload = request.files.get('file')
+        
+        if kind not in IMPORT_SCHEMAS or not upload or not upload.filename:
+            flash('Please choose a CSV file and what it contains.', 'error')
+            return render_template('import.html')
+        
+        try:
+            result = import_uploaded_file(
+                upload, user_id, kind,
+                progress=lambda r: log_event('import_progress', user_id=user_id, kind=kind,
+                                             imported=r.imported, skipped=r.skipped)
+            )
+        except (ValueError, UnicodeDecodeError) as e:
+            flash(f'Import failed: {e}', 'error')
+            return render_template('import.html')
+        
+        flash(f'Imported {result.imported:,} {kind} rows ({result.skipped:,} skipped).', 'success')
+        drain_soon(result.budget_breaches)
+        for breach in result.budget_breaches:
+            flash(f'⚠️ You have used {breach.percent_used:.0f}% of your ${breach.budget:.2f} monthly budget '
+                  f'(${breach.spent:.2f} spent this month).', 'error')
+        for line, message in result.errors[:10]:
+            flash(f'Line {line}: {message}', 'error')
+        return redirect(url_for('dashboard'))
+    
+    return render_template('import.html')
+
 @app.route('/settings', methods=['GET', 'POST'])
 def settings():
     """User settings"""
@@ -240,21 +287,19 @@ def settings():
         user_id = session['user_id']
         budget = float(request.form['budget'])
         
-        conn = sqlite3.connect('expensetracker.db')
-        cursor = conn.cursor()
-        cursor.execute('UPDATE users SET budget = ? WHERE id = ?', (budget, user_id))
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE users SET budget = ? WHERE id = ?', (budget, user_id))
+            bump_data_version(cursor, user_id)
         
         flash('Settings updated successfully!', 'success')
         return redirect(url_for('dashboard'))
     
     # Get current settings
-    conn = sqlite3.connect('expensetracker.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT budget FROM users WHERE id = ?', (session['user_id'],))
-    budget = cursor.fetchone()[0]
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT budget FROM users WHERE id = ?', (session['user_id'],))
+        budget = cursor.fetchone()[0]
     
     return render_template('settings.html', budget=budget)
     
@@ -0,0 +1,20 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py
+
+The schema is migrated once at import time; with gunicorn's preload that is
+once in the master before the workers fork, and the master then closes its
+pooled connections so no worker inherits an open SQLite handle (SQLite
+connections must not be carried across fork()). The scheduler is started per
+worker by the post_worker_init hook in gunicorn.conf.py, and only the worker
+that wins the leader lock (see leader.py) actually runs it.
+"""
+
+from .database import get_pool
+from .webapp import app, init_db
+
+init_db()
+get_pool().close_all()
+
+application = app
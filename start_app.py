@@ -6,15 +6,15 @@ This script starts both the web application and the automation system.
 
 import os
 import sys
-import threading
 import time
 
 def start_automation():
-    """Start the automation system in a separate thread"""
+    """Start the automation system if this process wins the scheduler lock"""
     print("🤖 Starting automation system...")
     try:
         from src.automation import start_automation
-        start_automation()
+        from src.leader import start_scheduler_when_leader
+        start_scheduler_when_leader(start_automation)
     except Exception as e:
         print(f"⚠️ Could not start automation: {e}")
         print("📧 Email alerts will not be sent automatically")
@@ -29,9 +29,8 @@ def start_web_app():
         init_db()
         print("📁 Database initialized")
         
-        # Start automation in background
-        automation_thread = threading.Thread(target=start_automation, daemon=True)
-        automation_thread.start()
+        # Start automation in background (elected, so extra instances never duplicate alerts)
+        start_automation()
         
         print("\n" + "="*60)
         print("🎉 EXPENSETRACKER MULTI-USER APP READY!")
@@ -58,12 +57,20 @@ def start_web_app():
         print(f"❌ Error starting web app: {e}")
         return False
 
+def start_production_server():
+    """Replace this process with gunicorn (see gunicorn.conf.py)"""
+    print("🏭 Starting production server (gunicorn)...")
+    config = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+    os.execvp('gunicorn', ['gunicorn', '-c', config])
+
 if __name__ == "__main__":
     print("🚀 ExpenseTracker Multi-User App Starting...")
     print("💰 Your complete financial tracking solution")
     print("-" * 50)
     
     try:
+        if '--production' in sys.argv[1:]:
+            start_production_server()
         start_web_app()
     except KeyboardInterrupt:
         print("\n👋 ExpenseTracker stopped. Have a great day!")